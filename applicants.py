@@ -0,0 +1,196 @@
+# applicants.py
+
+import io
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from row_expansion import expand_rows
+
+# 複数の出願人を区切る文字（全角・半角）
+_SPLIT_RE = re.compile(r'[、，,；;､]')
+# 法人格の略記（NFKC正規化後）→ 正式な表記
+_CORPORATE_ABBREVIATIONS = {
+    '(株)': '株式会社',
+    '(有)': '有限会社',
+    '(同)': '合同会社',
+    '(財)': '財団法人',
+    '(社)': '社団法人',
+}
+# 照合キーで前後の位置を区別しない法人格（前株・後株の違いを同一視する。法人格の種類は区別する）
+_CORPORATE_FORMS = '|'.join(_CORPORATE_ABBREVIATIONS.values())
+_CORPORATE_FORM_RE = re.compile(rf'^(?:({_CORPORATE_FORMS})(.+)|(.+?)({_CORPORATE_FORMS}))$')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_applicant_name(name):
+    """
+    出願人名の表記を揃える（NFKC正規化、空白の除去、法人格の略記の展開）。
+
+    例: "ｷﾔﾉﾝ㈱ " → "キヤノン株式会社"
+    """
+    name = _SPACE_RE.sub('', unicodedata.normalize('NFKC', name))
+    for abbreviation, form in _CORPORATE_ABBREVIATIONS.items():
+        name = name.replace(abbreviation, form)
+    return name
+
+
+def applicant_key(name):
+    """
+    同一の出願人とみなすための照合キー（法人格が前後どちらにあるかと、大文字小文字を無視する）。
+
+    法人格の種類はキーに残す（例: "株式会社テクノ" と "テクノ株式会社" は同じキー、"テクノ有限会社" は別のキー）。
+    """
+    name = normalize_applicant_name(name)
+    m = _CORPORATE_FORM_RE.match(name)
+    if m is None:
+        return name.casefold()
+    form = m.group(1) or m.group(4)
+    bare = m.group(2) or m.group(3)
+    return f"{bare.casefold()}|{form}"
+
+
+def read_alias_table(file_bytes):
+    """
+    別名表のCSV（1列目: 別名, 2列目: 正式名）を読み込む。
+
+    Returns:
+        dict: 別名の照合キー → 正式名
+    """
+    df_alias = pd.read_csv(io.BytesIO(file_bytes), encoding='utf-8', encoding_errors='ignore', dtype='str').dropna()
+    return {applicant_key(alias): normalize_applicant_name(canonical) for alias, canonical in df_alias.iloc[:, :2].itertuples(index=False)}
+
+
+def build_applicant_tables(applicant_strings, aliases=None):
+    """
+    出願人/権利者の列から、出願人の次元表と、行と出願人の対応表を作成する。
+
+    文字列処理は重複を除いた出願人/権利者の文字列に対してのみ行い、照合キーは辞書で引く。
+
+    Args:
+        applicant_strings (pd.Series): 出願人/権利者の列（インデックスは0からの連番であること）
+        aliases (dict): read_alias_tableで読み込んだ別名表
+
+    Returns:
+        tuple:
+            pd.DataFrame: 出願人ID, 出願人 の列を持つ次元表（出願人IDは照合キーの順に振った0からの連番）
+            pd.DataFrame: 行, 出願人ID の列を持つ対応表
+    """
+    aliases = aliases or {}
+    # 欠損は空の文字列にする（astype('str')では 'None' や 'nan' という名前になるため）
+    string_ids, unique_strings = pd.factorize(applicant_strings.fillna('').astype('str'))
+
+    # 📌 重複を除いた文字列ごとに分割し、分割後の表記も重複を除いてから正規化する
+    tokens = pd.Series(unique_strings, dtype='object').str.split(_SPLIT_RE).explode()
+    token_ids, unique_tokens = pd.factorize(tokens)
+    token_names = []
+    token_keys = []
+    for token in unique_tokens:
+        name = normalize_applicant_name(token)
+        key = applicant_key(name)
+        if key in aliases:  # 別名表に載っている場合は正式名のキーにまとめる
+            name = aliases[key]
+            key = applicant_key(name)
+        token_names.append(name)
+        token_keys.append(key if name else None)
+
+    # 📌 照合キーの順に安定した出願人IDを振る（出願人名でない表記は除く）
+    key_ids, unique_keys = pd.factorize(pd.Series(token_keys, dtype='object'), sort=True)
+    token_applicant_ids = key_ids[token_ids]
+    valid = token_applicant_ids >= 0
+    pairs = pd.DataFrame({
+        'owner': tokens.index.to_numpy()[valid],
+        '出願人ID': token_applicant_ids[valid],
+        '出願人': np.asarray(token_names, dtype='object')[token_ids[valid]],
+        }).drop_duplicates(['owner', '出願人ID'])
+    owners = pairs['owner'].to_numpy()
+
+    # 📌 文字列ごとの出願人を元の行に展開する
+    rows, positions = expand_rows(string_ids, owners, len(unique_strings))
+    bridge = pd.DataFrame({'行': rows, '出願人ID': pairs['出願人ID'].to_numpy()[positions]})
+
+    # 📌 表示名は同じキーの中で最も多く使われている表記にする
+    display_names = (
+        pd.DataFrame({'出願人ID': bridge['出願人ID'], '出願人': pairs['出願人'].to_numpy()[positions]})
+        .groupby(['出願人ID', '出願人']).size()
+        .sort_values(ascending=False, kind='stable')
+        .reset_index()
+        .drop_duplicates('出願人ID')
+        .set_index('出願人ID')['出願人']
+        .reindex(range(len(unique_keys)))
+    )
+    applicants = pd.DataFrame({'出願人ID': np.arange(len(unique_keys)), '出願人': display_names.to_numpy()})
+    return applicants, bridge
+
+
+class ApplicantCounts:
+    """
+    出願人ごとの件数を、出願人IDを行とする疎行列で持つ。
+
+    上位N件は件数順の出願人IDの先頭を、出願人ごとの推移は行を取り出すだけで得られる。
+    """
+    __slots__ = ('years', 'stages', 'totals', 'by_year', 'by_stage', 'ranking')
+
+    def __init__(self, applicant_ids, years, stages, n_applicants):
+        """
+        Args:
+            applicant_ids (np.ndarray): 対応表の出願人ID
+            years (pd.Series): applicant_idsと同じ並びの年（欠損は年別の件数に含めない）
+            stages (pd.Series): applicant_idsと同じ並びのステージ
+            n_applicants (int): 出願人の次元表の行数
+        """
+        applicant_ids = np.asarray(applicant_ids, dtype='int64')
+        year_codes, self.years = pd.factorize(years, sort=True)
+        stage_codes, self.stages = pd.factorize(stages, sort=True)
+        self.totals = np.bincount(applicant_ids, minlength=n_applicants)
+        self.by_year = _count_matrix(applicant_ids, year_codes, (n_applicants, len(self.years)))
+        self.by_stage = _count_matrix(applicant_ids, stage_codes, (n_applicants, len(self.stages)))
+        # 📌 件数の多い順の出願人ID（件数が0の出願人は含めない）
+        ranking = np.argsort(-self.totals, kind='stable')
+        self.ranking = ranking[self.totals[ranking] > 0]
+
+    def top(self, n):
+        """件数の多い順に上位n件の出願人IDを返す"""
+        return self.ranking[:n]
+
+    def year_counts(self, applicant_id):
+        """出願人の年ごとの件数"""
+        return self.by_year[applicant_id].toarray().ravel()
+
+    def stage_counts(self, applicant_ids):
+        """出願人 × ステージの件数（applicant_idsの並び）"""
+        return self.by_stage[applicant_ids].toarray()
+
+    def to_frame(self, applicants, applicant_ids=None):
+        """
+        出願人ごとの件数の表を作成する。
+
+        Args:
+            applicants (pd.DataFrame): build_applicant_tablesで作成した次元表
+            applicant_ids (np.ndarray): 表に含める出願人ID（Noneの場合は件数の多い順にすべて）
+
+        Returns:
+            pd.DataFrame: 出願人ID, 出願人/権利者, 件数, ステージ_<ステージ>, <年>年 の列を持つ表
+        """
+        if applicant_ids is None:
+            applicant_ids = self.ranking
+        df = pd.DataFrame({
+            '出願人ID': applicant_ids,
+            '出願人/権利者': applicants['出願人'].to_numpy()[applicant_ids],
+            '件数': self.totals[applicant_ids],
+            })
+        stage_columns = pd.DataFrame(self.stage_counts(applicant_ids), columns=[f'ステージ_{stage}' for stage in self.stages])
+        year_columns = pd.DataFrame(self.by_year[applicant_ids].toarray(), columns=[f'{year}年' for year in self.years])
+        return pd.concat([df, stage_columns, year_columns], axis=1)
+
+
+def _count_matrix(row_ids, col_codes, shape):
+    # 欠損（コードが-1）は数えない。重複する (行, 列) はCSRへの変換で合計される
+    # scipyは読み込みに時間がかかるため、集計するときにインポートする
+    from scipy import sparse
+
+    valid = col_codes >= 0
+    data = np.ones(valid.sum(), dtype='int64')
+    return sparse.coo_matrix((data, (row_ids[valid], col_codes[valid])), shape=shape).tocsr()
@@ -0,0 +1,59 @@
+# import_time.py
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = ['views.home', 'views.patent', 'views.claim', 'views.others']
+# 新たに読み込まれていれば表示する重いライブラリ
+HEAVY_MODULES = ['pandas', 'pyarrow', 'scipy', 'sklearn', 'plotly', 'matplotlib', 'PIL', 'pdfminer']
+
+# 📌 サーバーと同じくstreamlitを読み込んだ状態から、モジュールのimportにかかる時間を計る
+_SCRIPT = """
+import sys, json, time
+import streamlit
+before = set(sys.modules)
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'loaded': [name for name in {heavy!r} if name in set(sys.modules) - before]}}))
+"""
+
+
+def measure_import(module, repeat=3):
+    """
+    新しいPythonプロセスでモジュールをimportし、かかった時間（repeat回の最小値）を返す。
+
+    Returns:
+        tuple: (秒, 読み込まれた重いライブラリのリスト)
+    """
+    seconds = float('inf')
+    loaded = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', _SCRIPT.format(module=module, heavy=HEAVY_MODULES)],
+            capture_output=True, text=True, check=True, cwd=ROOT_DIR).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        seconds = min(seconds, result['seconds'])
+        loaded = result['loaded']
+    return seconds, loaded
+
+
+def main(argv=None):
+    """importにかかる時間を計測するコマンドラインエントリポイント"""
+    parser = argparse.ArgumentParser(description="Measure cold import time of the app's page modules.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="modules to import (default: all pages)")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh processes per module; the fastest is reported")
+    args = parser.parse_args(argv)
+
+    for module in args.modules:
+        seconds, loaded = measure_import(module, args.repeat)
+        print(f"{module:<20} {seconds * 1000:>8.0f} ms  {', '.join(loaded) or '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
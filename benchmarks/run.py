@@ -0,0 +1,168 @@
+# run.py
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+import subprocess
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import generate_claim_texts, generate_patent_csv
+from ingest import prepare_file, derive_stage
+from fi_codes import FiCube, build_fi_table
+from applicants import ApplicantCounts, build_applicant_tables
+from trends import count_by_period
+from claim_parser import parse_document
+from highlighter import Highlighter
+from search_index import INDEXED_SECTIONS, SearchIndex, parse_query
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def measure(func, repeat=3):
+    """
+    関数の実行時間（repeat回の最小値）と、tracemallocで計測した最大メモリ使用量を返す。
+
+    Returns:
+        tuple: (戻り値, 秒, 最大メモリ[bytes])
+    """
+    seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        seconds = min(seconds, time.perf_counter() - start)
+    # 📌 メモリは時間とは別に計測する（tracemallocを有効にすると遅くなるため）
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def record(results, name, func, items, repeat):
+    """ステージを計測し、件数あたりのスループットとともにresultsに追加する"""
+    result, seconds, peak = measure(func, repeat)
+    results[name] = {
+        'items': items,
+        'seconds': round(seconds, 4),
+        'items_per_second': round(items / seconds) if seconds > 0 else None,
+        'peak_memory_mb': round(peak / 1024 / 1024, 1),
+    }
+    print(f"  {name:<28} {seconds * 1000:>10.1f} ms {results[name]['peak_memory_mb']:>8.1f} MB", file=sys.stderr)
+    return result
+
+
+def bench_patent_stages(n_rows, repeat):
+    """CSVの取り込みから集計までの各ステージを計測する"""
+    csv_bytes = generate_patent_csv(n_rows).to_csv(index=False).encode('utf-8')
+    results = {}
+
+    df, fi_table = record(results, 'csv.prepare_file', lambda: prepare_file(csv_bytes), n_rows, repeat)
+    df = derive_stage(df, '出願日')
+    record(results, 'fi.build_fi_table', lambda: build_fi_table(df['文献番号'], df['FI']), len(df), repeat)
+    record(results, 'fi.cube', lambda: FiCube(fi_table, df['文献番号'], df['年'], df['ステージ']), len(fi_table), repeat)
+    applicants, bridge = record(results, 'applicants.build_tables', lambda: build_applicant_tables(df['出願人/権利者']), len(df), repeat)
+    positions = bridge['行'].to_numpy()
+    record(
+        results, 'applicants.counts',
+        lambda: ApplicantCounts(bridge['出願人ID'].to_numpy(), df['年'].iloc[positions], df['ステージ'].iloc[positions], len(applicants)),
+        len(bridge),
+        repeat,
+        )
+    record(results, 'trends.count_by_period', lambda: count_by_period(df, '出願日', 'M', ['公開', '登録', '公告']), len(df), repeat)
+    return results
+
+
+def bench_claim_stages(n_docs, repeat):
+    """公報テキストの解析、ハイライト、全文検索を計測する"""
+    texts = generate_claim_texts(n_docs)
+    results = {}
+
+    docs = record(results, 'claims.parse_document', lambda: [parse_document(text) for text in texts], n_docs, repeat)
+    highlighter = Highlighter(['半導体', '基板', '制御', 'センサ'])
+    claims = [doc.section('特許請求の範囲') or '' for doc in docs]
+    record(results, 'highlight.count', lambda: [highlighter.count(text) for text in claims], n_docs, repeat)
+    record(results, 'highlight.highlight', lambda: [highlighter.highlight(text) for text in claims], n_docs, repeat)
+
+    def build_index():
+        index = SearchIndex(None)
+        for i, doc in enumerate(docs):
+            index.add(str(i), {section_name: doc.section(section_name) for section_name in INDEXED_SECTIONS})
+        return index
+
+    index = record(results, 'search.index', build_index, n_docs, repeat)
+    query = parse_query('半導体 基板 OR 電極 -ロボット')
+    record(results, 'search.query', lambda: index.search(query, INDEXED_SECTIONS), n_docs, repeat)
+    return results
+
+
+def git_revision():
+    """作業ツリーのコミット（取得できない場合はNone）"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline_path, results):
+    """以前の結果と比べた実行時間の比を表示する"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_path} ({baseline.get('revision')}):", file=sys.stderr)
+    for size, stages in results['results'].items():
+        for name, result in stages.items():
+            before = baseline['results'].get(size, {}).get(name)
+            if before is None or not before['seconds']:
+                continue
+            print(f"  {size:>9} {name:<28} {result['seconds'] / before['seconds']:>6.2f}x", file=sys.stderr)
+
+
+def main(argv=None):
+    """ベンチマークのコマンドラインエントリポイント"""
+    parser = argparse.ArgumentParser(description="Benchmark the patent analysis pipeline on synthetic J-PlatPat data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="numbers of CSV rows to benchmark")
+    parser.add_argument("--claim-docs", type=int, default=None, help="number of claim texts (default: rows / 100)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage; the fastest is reported")
+    parser.add_argument("-o", "--output", default=None, help="result JSON path (default: results/<time>_<revision>.json)")
+    parser.add_argument("--compare", default=None, help="previous result JSON to compare against")
+    args = parser.parse_args(argv)
+
+    revision = git_revision()
+    results = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'revision': revision,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'results': {},
+    }
+    for size in args.sizes:
+        n_docs = args.claim_docs or max(100, size // 100)
+        print(f"{size} rows / {n_docs} claim texts", file=sys.stderr)
+        results['results'][str(size)] = {**bench_patent_stages(size, args.repeat), **bench_claim_stages(n_docs, args.repeat)}
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d_%H%M%S}_{revision or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Saved {output}", file=sys.stderr)
+    if args.compare:
+        compare(args.compare, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+# synthetic.py
+
+import numpy as np
+import pandas as pd
+
+# 出願人の候補（表記ゆれは generate_applicants で作る）
+_COMPANIES = [
+    'キヤノン', 'ソニーグループ', 'トヨタ自動車', 'パナソニック', '日立製作所', '東芝', '富士通', '日本電気',
+    '三菱電機', 'デンソー', 'セイコーエプソン', 'リコー', '村田製作所', '京セラ', 'シャープ', '本田技研工業',
+    ] + [f'テクノ{i:03d}' for i in range(500)]
+_STAGES = ['公開', '登録', '公告']
+_STAGE_WEIGHTS = [0.6, 0.35, 0.05]
+_SUBCLASS_LETTERS = list('BCDFGJKLMNPQ')
+_WORDS = [
+    '半導体', '基板', '絶縁膜', '電極', 'トランジスタ', '撮像素子', '画像', '信号', '処理', '車両', '制御',
+    '電池', '正極', '負極', '電解質', 'モータ', 'センサ', '通信', '端末', '無線', '学習', 'モデル', '推定',
+    'ロボット', 'アーム', '把持', '光学', 'レンズ', '表示', '装置',
+]
+
+
+def _join_random(rng, pool, counts, sep):
+    # 行ごとにcounts個の要素をpoolから選んでsepで連結する
+    picks = rng.choice(pool, counts.sum())
+    ends = np.cumsum(counts)
+    return [sep.join(picks[end - count:end]) for end, count in zip(ends, counts)]
+
+
+def generate_fi_codes(rng, n_codes=3000):
+    """FIコードの候補（例: "H01L21/302@A"）"""
+    sections = rng.choice(list('ABCDEFGH'), n_codes)
+    classes = rng.integers(1, 100, n_codes)
+    subclasses = rng.choice(_SUBCLASS_LETTERS, n_codes)
+    groups = rng.integers(1, 50, n_codes)
+    subgroups = rng.choice([0, 2, 10, 302, 1234], n_codes)
+    facets = rng.choice(['', '', '', '@A', '@B', '@Z'], n_codes)
+    return np.array([
+        f"{s}{c:02d}{sc}{g}/{sg:02d}{f}" for s, c, sc, g, sg, f in zip(sections, classes, subclasses, groups, subgroups, facets)
+    ])
+
+
+def generate_fi_strings(rng, n_rows, fi_codes):
+    """カンマ区切りのFI文字列（数字のみの展開記号を含む）"""
+    counts = rng.integers(1, 5, n_rows)
+    picks = rng.choice(fi_codes, counts.sum())
+    suffixes = rng.choice(['', '', '', ',101', ',102'], counts.sum())  # 数字のみのエントリ（直前のコードと結合される）
+    entries = np.char.add(picks.astype('U'), suffixes.astype('U'))
+    ends = np.cumsum(counts)
+    return [','.join(entries[end - count:end]) for end, count in zip(ends, counts)]
+
+
+def generate_applicants(rng, n_rows):
+    """読点区切りの出願人/権利者（法人格の位置や略記の表記ゆれを含む）"""
+    names = np.array(_COMPANIES)
+    weights = 1 / np.arange(1, len(names) + 1)
+    weights /= weights.sum()
+    counts = rng.choice([1, 1, 1, 2, 3], n_rows)
+    picks = rng.choice(names, counts.sum(), p=weights)
+    forms = rng.choice(['{}株式会社', '株式会社{}', '{}(株)', '{}株式会社 '], counts.sum(), p=[0.7, 0.1, 0.1, 0.1])
+    variants = np.array([form.format(name) for form, name in zip(forms, picks)])
+    ends = np.cumsum(counts)
+    return ['、'.join(variants[end - count:end]) for end, count in zip(ends, counts)]
+
+
+def generate_sentences(rng, n_rows, n_words=40):
+    """単語を並べた要約風の文章"""
+    counts = rng.integers(n_words // 2, n_words * 3 // 2, n_rows)
+    return _join_random(rng, np.array(_WORDS), counts, 'を')
+
+
+def generate_patent_csv(n_rows, seed=0, duplicate_rate=0.02):
+    """
+    J-PlatPatの検索結果CSVと同じ列を持つ合成データを作成する。
+
+    Args:
+        n_rows (int): 行数（重複行を含む）
+        seed (int): 乱数の種
+        duplicate_rate (float): 文献番号と出願日が同じ重複行の割合
+
+    Returns:
+        pd.DataFrame: 文献番号, 出願番号, 出願日, 公知日, 発明の名称, 出願人/権利者, FI, ステージ, 要約 の列を持つ表
+    """
+    rng = np.random.default_rng(seed)
+    n_unique = max(1, int(n_rows * (1 - duplicate_rate)))
+    source = np.r_[np.arange(n_unique), rng.integers(0, n_unique, n_rows - n_unique)]
+    filed = pd.Timestamp('2000-01-01') + pd.to_timedelta(rng.integers(0, 365 * 24, n_unique), unit='D')
+    published = filed + pd.Timedelta(days=548)
+    years = filed.year.to_numpy()
+    df = pd.DataFrame({
+        '文献番号': [f'特開{year}-{i:06d}' for year, i in zip(years + 1, range(n_unique))],
+        '出願番号': [f'特願{year}-{i:06d}' for year, i in zip(years, range(n_unique))],
+        '出願日': filed.strftime('%Y/%m/%d'),
+        '公知日': published.strftime('%Y/%m/%d'),
+        '発明の名称': _join_random(rng, np.array(_WORDS), rng.integers(2, 5, n_unique), 'の'),
+        '出願人/権利者': generate_applicants(rng, n_unique),
+        'FI': generate_fi_strings(rng, n_unique, generate_fi_codes(rng)),
+        'ステージ': rng.choice(_STAGES, n_unique, p=_STAGE_WEIGHTS),
+        '要約': generate_sentences(rng, n_unique),
+    })
+    return df.iloc[source].reset_index(drop=True)
+
+
+def generate_claim_texts(n_docs, seed=0, n_claims=10):
+    """
+    pdf_extractで抽出した公報のテキストと同じ形式の合成データを作成する。
+
+    Returns:
+        list: 【要約】【課題】【解決手段】【選択図】【特許請求の範囲】【発明の詳細な説明】を含む文章
+    """
+    rng = np.random.default_rng(seed)
+    texts = []
+    for i in range(n_docs):
+        sentences = generate_sentences(rng, n_claims + 3)
+        claims = [f"【請求項1】{sentences[0]}装置。"]
+        for k in range(2, n_claims + 1):
+            parent = rng.integers(1, k)
+            claims.append(f"【請求項{k}】請求項{parent}に記載の装置であって、{sentences[k]}装置。")
+        texts.append(
+            f"【要約】【課題】{sentences[1]}。【解決手段】{sentences[2]}。【選択図】図1"
+            f"【特許請求の範囲】{''.join(claims)}【発明の詳細な説明】{sentences[-1] * 20}"
+        )
+    return texts
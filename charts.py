@@ -0,0 +1,184 @@
+# charts.py
+
+import time
+
+import numpy as np
+import plotly.graph_objs as go
+from plotly.colors import qualitative
+
+from profiling import stage
+
+# この点数を超える散布図はWebGL（Scattergl）で描画する
+WEBGL_THRESHOLD = 2000
+# バブルチャートで出願人ごとにトレース（凡例）を作る上限（超える場合は1トレースにまとめる）
+BUBBLE_LEGEND_LIMIT = 100
+
+
+def scatter_trace(n_points, **kwargs):
+    """点数に応じてScatterかScatterglのトレースを作成する"""
+    trace_class = go.Scattergl if n_points > WEBGL_THRESHOLD else go.Scatter
+    return trace_class(**kwargs)
+
+
+def trend_chart(x, series, title, xaxis_title, yaxis_title='Counts'):
+    """
+    推移の折れ線グラフを作成する。
+
+    Args:
+        x (array-like): x軸の値（全系列で共通）
+        series (dict): 凡例名 → y軸の値
+        title (str): グラフのタイトル
+
+    Returns:
+        go.Figure: 作成したグラフ
+    """
+    n_points = len(x) * len(series)
+    fig = go.Figure()
+    for name, y in series.items():
+        fig.add_trace(scatter_trace(
+            n_points,
+            x=x,
+            y=np.asarray(y),
+            mode='lines+markers',
+            name=name,
+            ))
+    fig.update_layout(title=title, xaxis_title=xaxis_title, yaxis_title=yaxis_title)
+    return fig
+
+
+def applicant_bar_chart(names, stages, stage_counts):
+    """
+    出願人ごとのステージ別件数の積み上げ棒グラフを作成する（ステージごとに1トレース）。
+
+    Args:
+        names (np.ndarray): 出願人名（上から表示する順）
+        stages (array-like): ステージ
+        stage_counts (np.ndarray): 出願人 × ステージの件数
+
+    Returns:
+        go.Figure: 作成したグラフ
+    """
+    totals = stage_counts.sum(axis=1)
+    fig = go.Figure()
+    for i, stage in enumerate(stages):
+        fig.add_trace(go.Bar(
+            x=stage_counts[:, i],
+            y=names,
+            customdata=totals,
+            name=str(stage),
+            orientation='h',
+            hovertemplate='%{y}<br>%{fullData.name}: %{x}<br>Total: %{customdata}<extra></extra>',
+            ))
+    fig.update_layout(
+        title='Patents per Applicant',
+        height=1200,
+        width=900,
+        xaxis_title='Counts',
+        yaxis_title='Applicants',
+        yaxis=dict(autorange="reversed"),  # 件数が多い順に上から表示
+        barmode='stack'  # 積み上げ棒グラフ
+        )
+    return fig
+
+
+def applicant_bubble_chart(names, years, year_counts, legend_limit=BUBBLE_LEGEND_LIMIT):
+    """
+    出願人ごとの年次件数のバブルチャートを作成する。
+
+    出願人がlegend_limit以下の場合は出願人ごとに1トレースを作り、凡例で表示を切り替えられるようにする。
+    それより多い場合はトレースの作成に時間がかかるため、凡例のない1トレースにまとめる
+    （色は凡例ありの場合と同じ順に割り当て、出願人名はホバーとy軸で確認する）。
+    件数が0の年は点を作らない。バブルの大きさとは別に、件数をcustomdataでホバーに表示する。
+
+    Args:
+        names (np.ndarray): 出願人名（上から表示する順）
+        years (array-like): 年
+        year_counts (scipy.sparse.spmatrix): 出願人 × 年の件数（namesと同じ並び）
+        legend_limit (int): 出願人ごとにトレースを作る上限
+
+    Returns:
+        go.Figure: 作成したグラフ
+    """
+    counts = year_counts.tocoo()
+    order = np.argsort(counts.row, kind='stable')
+    rows = counts.row[order]
+    x = np.asarray(years, dtype='int64')[counts.col[order]]
+    data = counts.data[order]
+    names = np.asarray(names, dtype='object')
+    marker = dict(
+        opacity=0.6,  # バブルの透明度
+        line=dict(width=1, color='black'),  # バブルの枠線
+        )
+    hovertemplate = '%{y}<br>Year: %{x}<br>Counts: %{customdata}<extra></extra>'
+    fig = go.Figure()
+    if len(names) <= legend_limit:
+        # 📌 出願人ごとのトレース（凡例のクリックで表示を切り替えられる）
+        bounds = np.searchsorted(rows, np.arange(len(names) + 1))
+        fig.add_traces([
+            scatter_trace(
+                len(x),
+                x=x[start:end],
+                y=np.full(end - start, names[i], dtype='object'),
+                mode='markers',
+                marker=dict(marker, size=data[start:end] * 2),  # 件数に応じてバブルサイズを変化
+                customdata=data[start:end],
+                name=names[i],  # 出願人のラベル
+                hovertemplate=hovertemplate,
+                )
+            for i, (start, end) in enumerate(zip(bounds[:-1], bounds[1:]))
+            ])
+    else:
+        fig.add_trace(scatter_trace(
+            len(x),
+            x=x,
+            y=names[rows],
+            mode='markers',
+            # 出願人ごとに色を変える（色名の配列は検証が遅いため、既定の配色を段階的なカラースケールにして番号で指定する）
+            marker=dict(
+                marker,
+                size=data * 2,
+                color=rows % len(qualitative.Plotly),
+                colorscale=[[k / (len(qualitative.Plotly) - 1), color] for k, color in enumerate(qualitative.Plotly)],
+                cmin=0,
+                cmax=len(qualitative.Plotly) - 1,
+                ),
+            customdata=data,
+            hovertemplate=hovertemplate,
+            ))
+    fig.update_layout(
+        title="Applicant-wise Annual Patent Applications (Bubble Chart)",
+        xaxis_title="Year",
+        yaxis_title="Applicants",
+        yaxis=dict(autorange="reversed", categoryorder='array', categoryarray=list(names)),  # 出願件数が多い順に並べる
+        showlegend=len(names) <= legend_limit,
+        height=1600,
+        width=1200
+        )
+    return fig
+
+
+def build_figure(build, *args, measure_payload=False, **kwargs):
+    """
+    グラフを作成し、作成時間を計測する。
+
+    JSONへの変換はグラフ全体を1回シリアライズするため、measure_payloadを指定した場合だけ行う。
+
+    Returns:
+        tuple: (go.Figure, 作成時間[ms], JSONのサイズ[bytes]。計測しない場合はNone)
+    """
+    start = time.perf_counter()
+    with stage(f'charts.{build.__name__}'):
+        fig = build(*args, **kwargs)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    payload_bytes = None
+    if measure_payload:
+        with stage('charts.to_json'):
+            payload_bytes = len(fig.to_json())
+    return fig, elapsed_ms, payload_bytes
+
+
+def figure_caption(elapsed_ms, payload_bytes=None):
+    """build_figureの計測結果の表示用文字列"""
+    if payload_bytes is None:
+        return f"Built in {elapsed_ms:.0f} ms"
+    return f"Built in {elapsed_ms:.0f} ms, {payload_bytes / 1024:.1f} KiB"
@@ -0,0 +1,155 @@
+# claim_parser.py
+
+import re
+import bisect
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 解析結果の形式を変えた場合に上げる（キャッシュ済みの古い解析結果を無効にするため）
+PARSER_VERSION = 1
+
+# 表示するセクションと、その終端となる見出し
+SECTION_END = {
+    '課題': '解決手段',
+    '解決手段': '選択図',
+    '選択図': '特許請求の範囲',
+    '特許請求の範囲': '発明の詳細な説明',
+}
+SECTION_NAMES = tuple(SECTION_END.keys())
+
+# 見出しをまとめて1回で走査するための正規表現
+_HEADING_RE = re.compile(r'【(課題|解決手段|選択図|特許請求の範囲|発明の詳細な説明|請求項(\d+))】')
+
+# 従属請求項の引用（例: 請求項1に記載の、請求項1又は2、請求項1～3のいずれか）
+_CLAIM_REF_RE = re.compile(
+    r'請求項(\d+)((?:(?:[、，,・]|又は|または|若しくは|もしくは|及び|および|乃至|ないし|から|[～〜~－\-])(?:請求項)?\d+)*)')
+_REF_NUMBER_RE = re.compile(r'(乃至|ないし|から|[～〜~－\-])?(?:請求項)?(\d+)')
+
+
+class Claim:
+    """請求項1件分の位置と引用先"""
+    __slots__ = ('number', 'start', 'end', 'refs')
+
+    def __init__(self, number, start, end, refs=()):
+        self.number = number
+        self.start = start  # 見出し【請求項N】を含む開始位置
+        self.end = end
+        self.refs = tuple(refs)  # 引用している請求項番号（独立請求項の場合は空）
+
+    @property
+    def is_independent(self):
+        return len(self.refs) == 0
+
+
+class PatentDocument:
+    """
+    抽出テキストとセクション位置を保持する文書モデル。
+
+    セクション本文はテキストを都度スライスして取り出すため、本文のコピーは保持しない。
+    """
+    __slots__ = ('text', 'spans', 'claims', 'missing')
+
+    def __init__(self, text, spans, claims, missing=()):
+        self.text = text
+        self.spans = spans  # セクション名 → (開始位置, 終了位置)
+        self.claims = claims
+        self.missing = tuple(missing)  # 見つからなかったセクション名
+
+    def section(self, name):
+        """セクション本文を返す。見つからなかった場合はNone"""
+        span = self.spans.get(name)
+        if span is None:
+            return None
+        return self.text[span[0]:span[1]]
+
+    def claim_text(self, claim):
+        """見出しを含む請求項の本文を返す"""
+        return self.text[claim.start:claim.end]
+
+    def to_dict(self):
+        """キャッシュ保存用にテキスト以外の解析結果を辞書にする"""
+        return {
+            'version': PARSER_VERSION,
+            'spans': {name: list(span) for name, span in self.spans.items()},
+            'claims': [[c.number, c.start, c.end, list(c.refs)] for c in self.claims],
+            'missing': list(self.missing),
+        }
+
+    @classmethod
+    def from_dict(cls, text, data):
+        """to_dictの結果から復元する。形式が古い場合はNone"""
+        if data is None or data.get('version') != PARSER_VERSION:
+            return None
+        spans = {name: tuple(span) for name, span in data['spans'].items()}
+        claims = [Claim(n, s, e, refs) for n, s, e, refs in data['claims']]
+        return cls(text, spans, claims, data['missing'])
+
+
+def parse_claim_refs(claim_body, number=None):
+    """請求項本文から引用している請求項番号を取り出す（numberより前の請求項のみ）"""
+    refs = []
+    for m in _CLAIM_REF_RE.finditer(claim_body):
+        prev = int(m.group(1))
+        found = [prev]
+        for sep, digits in _REF_NUMBER_RE.findall(m.group(2)):
+            n = int(digits)
+            if sep and n > prev:
+                found.extend(range(prev + 1, n + 1))  # 範囲指定（請求項1～3）
+            else:
+                found.append(n)
+            prev = n
+        for n in found:
+            if (number is None or n < number) and n not in refs:
+                refs.append(n)
+    return refs
+
+
+def parse_document(text):
+    """
+    抽出テキストを1回の走査で解析し、PatentDocumentを作成する。
+
+    Args:
+        text (str): extract_text_from_bytesで抽出したテキスト
+
+    Returns:
+        PatentDocument: セクション位置と請求項のリストを持つ文書
+    """
+    # 📌 見出しの位置を1回の走査で収集する
+    heading_starts = {}  # 見出し名 → 見出し開始位置のリスト
+    heading_ends = {}  # 見出し名 → 本文開始位置のリスト
+    claim_headings = []  # (請求項番号, 見出し開始位置, 本文開始位置)
+    for m in _HEADING_RE.finditer(text):
+        if m.group(2) is not None:
+            claim_headings.append((int(m.group(2)), m.start(), m.end()))
+        else:
+            heading_starts.setdefault(m.group(1), []).append(m.start())
+            heading_ends.setdefault(m.group(1), []).append(m.end())
+
+    # 📌 各セクションは最初の見出しから、それ以降で最初に現れる終端の見出しまで
+    spans = {}
+    missing = []
+    for name, end_name in SECTION_END.items():
+        if name not in heading_ends:
+            missing.append(name)
+            continue
+        start = heading_ends[name][0]
+        end_positions = heading_starts.get(end_name, [])
+        k = bisect.bisect_left(end_positions, start)
+        end = end_positions[k] if k < len(end_positions) else len(text)
+        spans[name] = (start, end)
+
+    # 📌 特許請求の範囲の中にある請求項だけを切り出す
+    claims = []
+    if '特許請求の範囲' in spans:
+        section_start, section_end = spans['特許請求の範囲']
+        in_section = [h for h in claim_headings if section_start <= h[1] < section_end]
+        for k, (number, start, body_start) in enumerate(in_section):
+            end = in_section[k + 1][1] if k + 1 < len(in_section) else section_end
+            claims.append(Claim(number, start, end, parse_claim_refs(text[body_start:end], number)))
+        if len(claims) == 0:
+            missing.append('請求項')
+
+    if missing:
+        logger.warning("Sections not found in document: %s", ", ".join(missing))
+    return PatentDocument(text, spans, claims, missing)
@@ -0,0 +1,111 @@
+# extraction_cache.py
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+
+# キャッシュの保存先とサイズ上限（環境変数で上書き可能）
+DEFAULT_CACHE_DIR = os.environ.get(
+    "PATENT_ANALYSIS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "patent_analysis"))
+DEFAULT_MAX_BYTES = int(os.environ.get("PATENT_ANALYSIS_CACHE_MB", "1024")) * 1024 * 1024
+
+
+class ExtractionCache:
+    """
+    PDFの内容ハッシュをキーに、抽出テキストと解析済みセクションを保存する永続キャッシュ。
+
+    SQLiteに圧縮して保存し、合計サイズが上限を超えた場合は最終アクセスが古いものから削除する。
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(cache_dir, "extraction.sqlite3"), check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "hash TEXT PRIMARY KEY, text BLOB NOT NULL, sections BLOB, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access)")
+
+    def get_text(self, file_hash):
+        """抽出テキストを返す。未登録の場合はNone"""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT text FROM entries WHERE hash=?", (file_hash,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE entries SET last_access=? WHERE hash=?", (time.time(), file_hash))
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def put_text(self, file_hash, text):
+        """抽出テキストを保存する（既存のセクション情報は破棄する）"""
+        blob = zlib.compress(text.encode('utf-8'))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (hash, text, sections, size, last_access) VALUES (?, ?, NULL, ?, ?)",
+                (file_hash, blob, len(blob), time.time()))
+            self._evict()
+
+    def get_sections(self, file_hash):
+        """解析済みセクション（JSONに変換可能なオブジェクト）を返す。未登録の場合はNone"""
+        with self._lock:
+            row = self._conn.execute("SELECT sections FROM entries WHERE hash=?", (file_hash,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return json.loads(zlib.decompress(row[0]).decode('utf-8'))
+
+    def put_sections(self, file_hash, sections):
+        """テキストが登録済みのエントリに解析済みセクションを追加する"""
+        blob = zlib.compress(json.dumps(sections, ensure_ascii=False).encode('utf-8'))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE entries SET sections=?, size=length(text)+? WHERE hash=?", (blob, len(blob), file_hash))
+            self._evict()
+
+    def existing(self, file_hashes):
+        """file_hashesのうち、キャッシュに残っているハッシュの集合を返す"""
+        file_hashes = list(dict.fromkeys(file_hashes))
+        found = set()
+        with self._lock:
+            for i in range(0, len(file_hashes), 500):  # SQLiteの変数の数の上限を超えないように分割する
+                chunk = file_hashes[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT hash FROM entries WHERE hash IN ({','.join('?' * len(chunk))})", chunk).fetchall()
+                found.update(file_hash for file_hash, in rows)
+        return found
+
+    def _evict(self):
+        # 📌 合計サイズが上限以下になるまで、最終アクセスが古いエントリから削除する（ロック内で呼ぶ）
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        removed = []
+        for file_hash, size in self._conn.execute("SELECT hash, size FROM entries ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            removed.append((file_hash,))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE hash=?", removed)
+
+    def stats(self):
+        """ヒット数、ミス数、エントリ数、合計サイズを返す"""
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+        }
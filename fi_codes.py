@@ -0,0 +1,195 @@
+# fi_codes.py
+
+import numpy as np
+import pandas as pd
+
+from row_expansion import expand_rows
+
+# FI分類の階層（上位から順に）
+FI_LEVELS = ['セクション', 'クラス', 'サブクラス', 'グループ']
+
+
+def build_fi_table(doc_numbers, fi_strings):
+    """
+    カンマ区切りのFI文字列を、1行1コードの縦長のFIテーブルに正規化する。
+
+    数字のみのエントリ（例: "101"）は直前のFIコードと結合し（例: "H01L21/02-101"）、
+    FIコードをセクション、クラス、サブクラス、グループに分解する。行ごとのapplyは使わない。
+
+    Args:
+        doc_numbers (pd.Series): 文献番号
+        fi_strings (pd.Series): doc_numbersと同じ並びのFI文字列（例: "H01L21/02,101,G06F3/01"）
+
+    Returns:
+        pd.DataFrame: 文献番号, FI, セクション, クラス, サブクラス, グループ の列を持つテーブル（カテゴリ型）
+    """
+    # 📌 同じFI文字列は1回だけ処理する（文字列処理は重複を除いたFI文字列に対してのみ行う）
+    string_ids, unique_strings = pd.factorize(fi_strings.astype('str'))
+    codes = pd.Series(unique_strings).str.split(',').explode()
+    if len(codes) == 0:
+        return pd.DataFrame({col: pd.Categorical([]) for col in ['文献番号', 'FI'] + FI_LEVELS})
+    owners = codes.index.to_numpy()  # 各コードが属するFI文字列の番号
+    codes = codes.to_numpy()
+
+    # 📌 数字のみのエントリは直前のFIコードと同じブロックにまとめ、先頭と末尾を結合する
+    code_ids, unique_codes = pd.factorize(codes)
+    numeric = pd.Series(unique_codes).str.split('@', n=1).str[0].str.isdigit().to_numpy()[code_ids]
+    owner_start = np.r_[True, owners[1:] != owners[:-1]]
+    after_empty = np.r_[False, codes[:-1] == '']  # 空のコードには結合しない
+    starts = np.flatnonzero(~numeric | owner_start | after_empty)
+    ends = np.r_[starts[1:], len(codes)] - 1
+    first = codes[starts]
+    merged = first.copy()
+    joined = starts != ends
+    merged[joined] = first[joined] + '-' + codes[ends[joined]]
+    block_owners = owners[starts]
+    merged_ids, unique_merged = pd.factorize(merged)
+
+    # 📌 正規表現で重複を除いたFIコードを階層ごとに分解する（"/"を含まないコードは分解しない）
+    unique_merged = pd.Series(unique_merged)
+    main_part = unique_merged.str.extract(r'^([^/]+)/', expand=False)  # 例: "H01L21"
+    parsed = pd.DataFrame({
+        'FI': unique_merged,
+        'セクション': main_part.str[0],  # 例: "H"
+        'クラス': main_part.str[:3].where(main_part.str.len() >= 3),  # 例: "H01"
+        'サブクラス': main_part.str[:4],  # 例: "H01L"
+        'グループ': unique_merged.str.split('-', n=1).str[0].str.split('@', n=1).str[0].where(main_part.notna()),
+    }).astype('category')
+
+    # 📌 FI文字列ごとの解析結果を元の行に展開する
+    rows, positions = expand_rows(string_ids, block_owners, len(unique_strings))
+    table = parsed.iloc[merged_ids[positions]].reset_index(drop=True)
+    table.insert(0, '文献番号', pd.Categorical(doc_numbers.to_numpy()[rows]))
+    return table
+
+
+class FiCube:
+    """
+    FI階層（セクション → クラス → サブクラス → グループ）× 年 × ステージの文献数の集計表。
+
+    データセットごとに1回だけ作成し、絞り込みやドリルダウンは階層ごとのコードの配列を引くだけで行う。
+    """
+    __slots__ = ('years', 'stages', 'codes', 'parents', 'sections', 'counts')
+
+    def __init__(self, fi_table, doc_numbers, years, stages):
+        """
+        Args:
+            fi_table (pd.DataFrame): build_fi_tableで作成したテーブル
+            doc_numbers (pd.Series): 集計対象の文献番号
+            years (pd.Series): doc_numbersと同じ並びの年
+            stages (pd.Series): doc_numbersと同じ並びのステージ
+        """
+        year_codes, self.years = pd.factorize(years, sort=True, use_na_sentinel=False)
+        stage_codes, self.stages = pd.factorize(stages, sort=True, use_na_sentinel=False)
+        n_cells = len(self.years) * len(self.stages)
+
+        # 📌 FIテーブルの行を集計対象の文献の行に対応付ける（同じ文献番号が複数ある場合は最初の行）
+        doc_index = pd.Index(doc_numbers.to_numpy())
+        first = ~doc_index.duplicated()
+        doc_column = fi_table['文献番号'].astype('category')
+        category_rows = doc_index[first].get_indexer(doc_column.cat.categories)
+        category_rows = np.where(category_rows >= 0, np.flatnonzero(first)[category_rows], -1)
+        rows = category_rows[doc_column.cat.codes.to_numpy()]
+        in_scope = rows >= 0
+        rows = rows[in_scope].astype('int64')
+
+        self.codes = {}
+        self.parents = {}
+        self.sections = {}
+        self.counts = {}
+        for depth, level in enumerate(FI_LEVELS):
+            column = fi_table[level].astype('category')
+            codes = column.cat.categories.astype('str').to_numpy()
+            level_codes = column.cat.codes.to_numpy()[in_scope]
+            # 📌 同じ文献の同じコードは1件として数え、コード × 年 × ステージの配列に集計する
+            valid = level_codes >= 0
+            pairs = np.unique(rows[valid] * len(codes) + level_codes[valid])
+            pair_rows, pair_codes = np.divmod(pairs, len(codes))
+            cells = year_codes[pair_rows] * len(self.stages) + stage_codes[pair_rows]
+            self.counts[level] = np.bincount(
+                pair_codes * n_cells + cells, minlength=len(codes) * n_cells,
+                ).reshape(len(codes), len(self.years), len(self.stages))
+            self.codes[level] = codes
+            self.sections[level] = pd.Series(codes, dtype='object').str[0].to_numpy()
+            # 📌 上位の階層のコードを引けるようにする
+            if depth == 0:
+                self.parents[level] = np.full(len(codes), None, dtype='object')
+            else:
+                links = fi_table[[FI_LEVELS[depth - 1], level]].dropna().drop_duplicates(level)
+                parents = pd.Series(links[FI_LEVELS[depth - 1]].astype('str').to_numpy(), index=links[level].astype('str').to_numpy())
+                self.parents[level] = parents.reindex(codes).to_numpy()
+
+    def _selection(self, level, sections=None, parent=None):
+        # 階層のコードのうち、指定したセクションと上位のコードに属するもの
+        mask = np.ones(len(self.codes[level]), dtype='bool')
+        if sections is not None:
+            mask &= np.isin(self.sections[level], list(sections))
+        if parent is not None:
+            mask &= self.parents[level] == parent
+        return mask
+
+    def _stage_mask(self, stages):
+        if stages is None:
+            return np.ones(len(self.stages), dtype='bool')
+        return np.isin(np.asarray(self.stages, dtype='object'), list(stages))
+
+    def totals(self, level, sections=None, parent=None, stages=None):
+        """
+        階層ごとに、各コードを含む文献数を返す。
+
+        Args:
+            level (str): FI_LEVELSのいずれか
+            sections (list): 対象のセクション（Noneの場合はすべて）
+            parent (str): 上位の階層のコード（ドリルダウン時に指定する）
+            stages (list): 対象のステージ（Noneの場合はすべて）
+
+        Returns:
+            pd.Series: コード → 文献数（件数の多い順、0件のコードは含めない）
+        """
+        mask = self._selection(level, sections, parent)
+        counts = self.counts[level][mask][:, :, self._stage_mask(stages)].sum(axis=(1, 2))
+        totals = pd.Series(counts, index=pd.Index(self.codes[level][mask], name=level), name='件数')
+        return totals[totals > 0].sort_values(ascending=False, kind='stable')
+
+    def trend(self, level, code):
+        """
+        コードを含む文献数の年 × ステージの表を返す。
+
+        Returns:
+            pd.DataFrame: 年をインデックス、ステージを列とする表
+        """
+        position = np.flatnonzero(self.codes[level] == code)
+        if len(position) == 0:
+            return pd.DataFrame(0, index=pd.Index(self.years, name='年'), columns=self.stages)
+        return pd.DataFrame(self.counts[level][position[0]], index=pd.Index(self.years, name='年'), columns=self.stages)
+
+    def hierarchy(self, depth, sections=None, stages=None):
+        """
+        セクションから指定した階層までのツリー（サンバースト/ツリーマップ用）を返す。
+
+        葉の値は文献数、上位のコードの値は葉の合計になる（branchvalues='remainder'で描画する）。
+        各コードを含む実際の文献数は '文献数' 列に入る。
+
+        Args:
+            depth (str): FI_LEVELSのいずれか（ツリーの最下層）
+
+        Returns:
+            pd.DataFrame: id, parent, label, value, 文献数 の列を持つ表
+        """
+        stage_mask = self._stage_mask(stages)
+        last = FI_LEVELS.index(depth)
+        frames = []
+        for i, level in enumerate(FI_LEVELS[:last + 1]):
+            mask = self._selection(level, sections)
+            counts = self.counts[level][mask][:, :, stage_mask].sum(axis=(1, 2))
+            frame = pd.DataFrame({
+                'id': self.codes[level][mask],
+                'parent': self.parents[level][mask] if i > 0 else '',
+                'label': self.codes[level][mask],
+                'value': counts if i == last else 0,
+                '文献数': counts,
+                })
+            frames.append(frame[frame['文献数'] > 0])
+        tree = pd.concat(frames, ignore_index=True)
+        # 📌 上位の階層に現れないコード（分解できなかったコード）は除く
+        return tree[(tree['parent'] == '') | tree['parent'].isin(tree['id'])].reset_index(drop=True)
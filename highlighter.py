@@ -0,0 +1,69 @@
+# highlighter.py
+
+import re
+import html
+
+
+# 📌 無限に色を生成する関数（HSLを使って自動生成）
+def generate_color(index):
+    hue = (index * 137.508) % 360  # 黄金比を使って色相を均等に分布
+    return f"hsl({hue}, 75%, 75%)"
+
+
+class Highlighter:
+    """
+    複数の検索語を1つの正規表現にまとめ、テキストを1回の走査でハイライトする。
+
+    長い検索語を優先して照合するため、重なり合う検索語（例: 「半導体」と「半導体装置」）は
+    長い方として1回だけ数える。挿入したHTMLタグを後続の検索語が照合することはない。
+    """
+
+    def __init__(self, terms):
+        self.terms = []
+        self._index = {}  # 小文字化した検索語 → self.termsでの位置
+        for term in terms:
+            key = term.lower()
+            if term and key not in self._index:
+                self._index[key] = len(self.terms)
+                self.terms.append(term)
+        self.colors = [generate_color(i) for i in range(len(self.terms))]
+        if self.terms:
+            alternation = '|'.join(re.escape(term) for term in sorted(self.terms, key=len, reverse=True))
+            self._pattern = re.compile(alternation, flags=re.IGNORECASE)
+        else:
+            self._pattern = None
+
+    def _term_index(self, matched):
+        i = self._index.get(matched.lower())
+        if i is None:  # 小文字化で一致しない大文字小文字の組み合わせ
+            i = next(k for k, term in enumerate(self.terms) if re.fullmatch(re.escape(term), matched, flags=re.IGNORECASE))
+        return i
+
+    def count(self, text):
+        """検索語ごとのヒット数をself.termsと同じ順序のリストで返す"""
+        counts = [0] * len(self.terms)
+        if self._pattern is not None:
+            for m in self._pattern.finditer(text):
+                counts[self._term_index(m.group(0))] += 1
+        return counts
+
+    def highlight(self, text):
+        """
+        テキストをHTML形式でハイライトする。
+
+        Returns:
+            tuple: (ハイライト済みHTML, 検索語ごとのヒット数のリスト)
+        """
+        counts = [0] * len(self.terms)
+        if self._pattern is None:
+            return html.escape(text, quote=False), counts
+        parts = []
+        pos = 0
+        for m in self._pattern.finditer(text):
+            i = self._term_index(m.group(0))
+            counts[i] += 1
+            parts.append(html.escape(text[pos:m.start()], quote=False))
+            parts.append(f'<mark style="background-color: {self.colors[i]}">{html.escape(m.group(0), quote=False)}</mark>')
+            pos = m.end()
+        parts.append(html.escape(text[pos:], quote=False))
+        return ''.join(parts), counts
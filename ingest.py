@@ -0,0 +1,188 @@
+# ingest.py
+
+import io
+import hashlib
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from fi_codes import build_fi_table
+
+# 重複とみなすキー
+DEDUP_KEYS = ['文献番号', '出願日']
+# 文章の列（取り込み時には読み込まず、必要になったときにread_text_stageで読み込む）
+TEXT_COLUMNS = ['要約', '請求の範囲']
+# 列の型（ない列は無視する）
+COLUMN_DTYPES = {
+    '文献番号': 'str',
+    '出願番号': 'str',
+    '発明の名称': 'str',
+    '出願人/権利者': 'str',
+    'FI': 'str',
+    'ステージ': 'category',
+}
+# 1回に読み込む行数
+CHUNK_ROWS = 50000
+
+
+def hash_file_bytes(file_bytes):
+    """アップロードされたファイルの内容ハッシュを計算する"""
+    return hashlib.md5(file_bytes).hexdigest()
+
+
+def read_columns(file_bytes):
+    """CSVの列名だけを読み込む"""
+    return pd.read_csv(io.BytesIO(file_bytes), encoding='utf-8', encoding_errors='ignore', nrows=0).columns.to_list()
+
+
+def read_stage(file_bytes, columns=None):
+    """
+    読み込みステージ: J-PlatPatのCSVを型を指定して少しずつ読み込む。
+
+    Args:
+        file_bytes (bytes): CSVファイルのバイナリデータ
+        columns (list): 読み込む列（Noneの場合は文章の列以外のすべて）
+
+    Returns:
+        iterator: CHUNK_ROWS行ずつのDataFrame
+    """
+    available = read_columns(file_bytes)
+    if columns is None:
+        columns = [col for col in available if col not in TEXT_COLUMNS]
+    columns = [col for col in columns if col in available]
+    return pd.read_csv(
+        io.BytesIO(file_bytes), encoding='utf-8', encoding_errors='ignore', usecols=columns,
+        dtype={col: dtype for col, dtype in COLUMN_DTYPES.items() if col in columns}, chunksize=CHUNK_ROWS,
+        )
+
+
+def dedupe_stage(chunks):
+    """
+    重複除去ステージ: 文献番号と出願日が同じ行は最初の1行だけを残す。
+
+    読み込み済みのキーはハッシュ値の集合だけで持つため、チャンクを順に処理できる。
+
+    Args:
+        chunks (iterator): read_stageで読み込んだDataFrame
+
+    Returns:
+        iterator: 重複を除いたDataFrame
+    """
+    seen = set()
+    for chunk in chunks:
+        keys = pd.util.hash_pandas_object(chunk[DEDUP_KEYS], index=False).to_numpy()
+        # 📌 チャンク内で最初に現れ、以前のチャンクにもないキーの行だけを残す
+        keep = ~pd.Series(keys).duplicated().to_numpy()
+        keep &= np.fromiter((key not in seen for key in keys.tolist()), dtype='bool', count=len(keys))
+        seen.update(keys[keep].tolist())
+        yield chunk[keep]
+
+
+def _concat_chunks(chunks):
+    # チャンクを連結し、カテゴリ型の列を元に戻す（チャンクごとにカテゴリが異なるとobject型になるため）
+    df = pd.concat(list(chunks), ignore_index=True)
+    for col, dtype in COLUMN_DTYPES.items():
+        if dtype == 'category' and col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+
+def normalize_stage(df):
+    """
+    正規化ステージ: 日付列の変換、文字列列の型変換、FIコードの正規化を行う。
+
+    Returns:
+        tuple: (正規化したDataFrame, build_fi_tableで作成したFIテーブル)
+    """
+    # 日付列はすべてここで変換しておき、対象の日付列を切り替えても再変換しない
+    for col in df.columns:
+        if col.endswith('日'):
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+    df['出願人/権利者'] = df['出願人/権利者'].fillna('').astype('str')  # 欠損は 'nan' ではなく空にする
+    df['FI'] = df['FI'].astype('str')
+    return df, build_fi_table(df['文献番号'], df['FI'])
+
+
+def prepare_file(file_bytes):
+    """1ファイル分の読み込み、重複除去、正規化をまとめて行う（文章の列は読み込まない）"""
+    return normalize_stage(_concat_chunks(dedupe_stage(read_stage(file_bytes))))
+
+
+def _concat_fi_tables(fi_tables):
+    # カテゴリ型を保ったまま連結する（カテゴリが異なるとobject型になるため）
+    columns = {}
+    for col in fi_tables[0].columns:
+        columns[col] = union_categoricals([t[col] for t in fi_tables], ignore_order=True)
+    return pd.DataFrame(columns)
+
+
+def merge_prepared(prepared, new):
+    """
+    ファイル単位で準備したデータを既存のデータセットに追加する。
+
+    既存のデータセットにない (文献番号, 出願日) の行だけを追加するため、
+    全ファイルを連結してから重複除去した場合と同じ結果になる。
+
+    Args:
+        prepared (tuple): 既存の (DataFrame, FIテーブル)
+        new (tuple): 追加するファイルの (DataFrame, FIテーブル)
+
+    Returns:
+        tuple: 追加後の (DataFrame, FIテーブル)
+    """
+    df, fi_table = prepared
+    df_new, fi_new = new
+    existing = pd.MultiIndex.from_frame(df[DEDUP_KEYS])
+    is_new = ~pd.MultiIndex.from_frame(df_new[DEDUP_KEYS]).isin(existing)
+    df_added = df_new[is_new]
+    fi_added = fi_new[fi_new['文献番号'].isin(df_added['文献番号'])]
+    df_merged = _concat_chunks([df, df_added])
+    return df_merged, _concat_fi_tables([fi_table, fi_added])
+
+
+def derive_stage(df, date_col):
+    """派生ステージ: 対象の日付列から年の列を作成する"""
+    df = df.copy(deep=False)  # 列を追加するだけなので元のデータはコピーしない
+    df['年'] = df[date_col].dt.year.astype('Int64')
+    return df
+
+
+def read_text_stage(file_bytes, columns=TEXT_COLUMNS):
+    """
+    文章の列を、取り込み時と同じ重複除去の規則で読み込む。
+
+    Returns:
+        pd.DataFrame: 文献番号, 出願日（変換済み）と文章の列を持つ表（文章の列がない場合はNone）
+    """
+    columns = [col for col in columns if col in read_columns(file_bytes)]
+    if not columns:
+        return None
+    df = _concat_chunks(dedupe_stage(read_stage(file_bytes, DEDUP_KEYS + columns)))
+    df['出願日'] = pd.to_datetime(df['出願日'], errors='coerce')
+    return df
+
+
+def align_texts(df, text_tables, columns=TEXT_COLUMNS):
+    """
+    read_text_stageで読み込んだ文章を、データセットの行の並びに揃える。
+
+    複数のファイルに同じ行がある場合は、先のファイルの文章を使う。
+
+    Args:
+        df (pd.DataFrame): データセット
+        text_tables (list): ファイルごとのread_text_stageの結果
+
+    Returns:
+        pd.DataFrame: dfと同じインデックスを持つ文章の列の表
+    """
+    keys = pd.MultiIndex.from_frame(df[DEDUP_KEYS])
+    texts = pd.DataFrame(index=df.index)
+    for table in text_tables:
+        if table is None:
+            continue
+        table = table.drop_duplicates(DEDUP_KEYS)
+        positions = pd.MultiIndex.from_frame(table[DEDUP_KEYS]).get_indexer(keys)
+        for col in table.columns.drop(DEDUP_KEYS):
+            values = pd.Series(table[col].to_numpy()[positions], index=df.index).where(positions >= 0)
+            texts[col] = texts[col].combine_first(values) if col in texts.columns else values
+    return texts[[col for col in columns if col in texts.columns]]
@@ -0,0 +1,175 @@
+# near_duplicates.py
+
+import os
+import time
+import sqlite3
+import threading
+import unicodedata
+
+import numpy as np
+
+from extraction_cache import DEFAULT_CACHE_DIR
+
+# MinHashの関数の数、シングル（文字n-gram）の長さ、LSHのバンド数
+NUM_PERM = 64
+SHINGLE_SIZE = 5
+NUM_BANDS = 8
+# 署名の計算方法を変えた場合は上げる（古い署名はキャッシュから使わない）
+SIGNATURE_VERSION = 1
+
+_EMPTY = np.iinfo(np.uint32).max
+_rng = np.random.default_rng(20240706)
+# 📌 乗算シフト法のハッシュ関数の係数（署名をキャッシュするため乱数の種は固定）
+_HASH_A = _rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_HASH_B = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+
+
+def _shingle_hashes(text, shingle_size=SHINGLE_SIZE):
+    # 文字コードの配列から、長さshingle_sizeの部分文字列ごとの多項式ハッシュを計算する
+    text = ''.join(unicodedata.normalize('NFKC', text).split())
+    if not text:
+        return np.zeros(0, dtype=np.uint64)
+    chars = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    size = min(shingle_size, len(chars))
+    hashes = np.zeros(len(chars) - size + 1, dtype=np.uint64)
+    for j in range(size):
+        hashes = hashes * np.uint64(1000003) + chars[j:len(chars) - size + 1 + j]
+    return np.unique(hashes)
+
+
+def minhash_signature(text):
+    """
+    文章のMinHash署名を計算する。
+
+    Returns:
+        np.ndarray: 長さNUM_PERMのuint32の配列（文章が空の場合はすべて最大値）
+    """
+    hashes = _shingle_hashes(text)
+    if len(hashes) == 0:
+        return np.full(NUM_PERM, _EMPTY, dtype=np.uint32)
+    # 📌 NUM_PERM個のハッシュ関数を一度に適用し、それぞれの最小値を取る（オーバーフローは2**64で折り返す）
+    with np.errstate(over='ignore'):
+        permuted = (_HASH_A[:, None] * hashes[None, :] + _HASH_B[:, None]) >> np.uint64(32)
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+class SignatureCache:
+    """
+    文書のハッシュをキーに、MinHash署名を保存する永続キャッシュ。
+
+    署名は小さいため件数の上限は設けない。
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(cache_dir, "minhash.sqlite3"), check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS signatures ("
+                "hash TEXT NOT NULL, version INTEGER NOT NULL, signature BLOB NOT NULL, created REAL NOT NULL, "
+                "PRIMARY KEY (hash, version))"
+            )
+
+    def get_many(self, doc_hashes):
+        """登録済みの署名を返す（ハッシュ → 署名）"""
+        doc_hashes = list(dict.fromkeys(doc_hashes))
+        found = {}
+        with self._lock:
+            for i in range(0, len(doc_hashes), 500):  # SQLiteの変数の数の上限を超えないように分割する
+                chunk = doc_hashes[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT hash, signature FROM signatures WHERE version=? AND hash IN ({','.join('?' * len(chunk))})",
+                    (SIGNATURE_VERSION, *chunk)).fetchall()
+                for doc_hash, blob in rows:
+                    found[doc_hash] = np.frombuffer(blob, dtype=np.uint32)
+        return found
+
+    def put_many(self, signatures):
+        """署名を保存する（ハッシュ → 署名）"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO signatures (hash, version, signature, created) VALUES (?, ?, ?, ?)",
+                [(doc_hash, SIGNATURE_VERSION, signature.astype(np.uint32).tobytes(), now) for doc_hash, signature in signatures.items()])
+
+
+def compute_signatures(doc_hashes, texts, cache=None):
+    """
+    文書ごとのMinHash署名を計算する。キャッシュ済みの文書は計算しない。
+
+    Args:
+        doc_hashes (list): 文書のハッシュ
+        texts (list): doc_hashesと同じ並びの文章
+        cache (SignatureCache): 署名のキャッシュ（Noneの場合はキャッシュしない）
+
+    Returns:
+        tuple:
+            np.ndarray: 文書 × NUM_PERM の署名
+            int: 新たに計算した文書数
+    """
+    cached = cache.get_many(doc_hashes) if cache is not None else {}
+    computed = {}
+    signatures = np.empty((len(doc_hashes), NUM_PERM), dtype=np.uint32)
+    for i, (doc_hash, text) in enumerate(zip(doc_hashes, texts)):
+        signature = cached.get(doc_hash)
+        if signature is None:
+            signature = computed.get(doc_hash)
+            if signature is None:
+                signature = computed[doc_hash] = minhash_signature(text)
+        signatures[i] = signature
+    if cache is not None and computed:
+        cache.put_many(computed)
+    return signatures, len(computed)
+
+
+def find_families(signatures, threshold=0.8, num_bands=NUM_BANDS):
+    """
+    LSHで候補の組を絞り込み、推定Jaccard係数がthreshold以上の文書を同じファミリーにまとめる。
+
+    同じバケットの文書は先頭の文書とだけ比較するため、比較回数は文書数にほぼ比例する。
+
+    Args:
+        signatures (np.ndarray): compute_signaturesで計算した署名
+        threshold (float): 同じファミリーとみなす推定Jaccard係数
+        num_bands (int): LSHのバンド数（NUM_PERMの約数）
+
+    Returns:
+        np.ndarray: 文書ごとのファミリー番号（文書数が多い順に0から振る）
+    """
+    # scipyは読み込みに時間がかかるため、ファミリーをまとめるときにインポートする
+    from scipy import sparse
+    from scipy.sparse.csgraph import connected_components
+
+    n = len(signatures)
+    if n == 0:
+        return np.zeros(0, dtype='int64')
+    rows_per_band = signatures.shape[1] // num_bands
+    non_empty = np.flatnonzero((signatures != _EMPTY).any(axis=1))
+    sources = []
+    targets = []
+    for band in range(num_bands):
+        # 📌 バンドの値が同じ文書をバケットにまとめ、バケットの先頭の文書と組にする
+        keys = np.ascontiguousarray(signatures[non_empty, band * rows_per_band:(band + 1) * rows_per_band])
+        keys = keys.view(np.dtype((np.void, keys.dtype.itemsize * rows_per_band))).ravel()
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        leaders = non_empty[first[inverse.ravel()]]
+        candidates = leaders != non_empty
+        sources.append(non_empty[candidates])
+        targets.append(leaders[candidates])
+    sources = np.concatenate(sources)
+    targets = np.concatenate(targets)
+    if len(sources):
+        pairs = np.unique(np.column_stack([sources, targets]), axis=0)
+        sources, targets = pairs[:, 0], pairs[:, 1]
+    # 📌 候補の組だけ署名の一致率（推定Jaccard係数）を確認する
+    similar = (signatures[sources] == signatures[targets]).mean(axis=1) >= threshold
+    graph = sparse.coo_matrix((np.ones(similar.sum()), (sources[similar], targets[similar])), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    # ファミリー番号は文書数の多い順にする
+    sizes = np.bincount(labels)
+    order = np.argsort(-sizes, kind='stable')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return rank[labels]
@@ -0,0 +1,156 @@
+# pdf_extract.py
+
+import os
+import io
+import sys
+import hashlib
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+
+def default_workers():
+    """利用可能なCPUコア数からワーカー数を決める"""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
+
+
+def hash_pdf_bytes(file_bytes):
+    """PDFのバイナリデータからキャッシュキーとなるハッシュ値を計算する"""
+    return hashlib.md5(file_bytes).hexdigest()
+
+
+def extract_text_from_bytes(file_bytes):
+    """
+    PDFのバイナリデータからテキストを抽出し、空白と改行を取り除く。
+
+    プロセスプールから呼び出されるため、モジュールのトップレベルに定義している。
+    """
+    # pdfminerはワーカー側でのみ必要になるため、ここでインポートする
+    from pdfminer.high_level import extract_text
+
+    with io.BytesIO(file_bytes) as pdf_file:  # `BytesIO` を使ってファイルオブジェクト化
+        text = extract_text(pdf_file)
+    return text.replace(' ', '').replace('\n', '').replace('\u3000', '')
+
+
+def _extract_job(index, file_bytes):
+    # 📌 壊れたPDFの例外はファイルごとに捕まえ、他のファイルの抽出を止めない
+    # （pdfminerの例外はpickleできない場合があるため、メッセージの文字列で返す）
+    try:
+        return index, extract_text_from_bytes(file_bytes), None
+    except Exception as e:
+        return index, None, f"{type(e).__name__}: {e}"
+
+
+def extract_texts_parallel(pdf_bytes_list, max_workers=None):
+    """
+    複数のPDFをプロセスプールで並列に抽出する。
+
+    Args:
+        pdf_bytes_list (list[bytes]): PDFのバイナリデータのリスト
+        max_workers (int): ワーカー数（Noneの場合は利用可能なコア数）
+
+    Yields:
+        tuple: 抽出が完了した順に (入力のインデックス, 抽出テキスト, エラー)。
+            抽出に失敗したファイルは抽出テキストがNoneで、エラーにメッセージが入る
+    """
+    if len(pdf_bytes_list) == 0:
+        return
+    workers = min(max_workers or default_workers(), len(pdf_bytes_list))
+
+    # 1ファイルまたは1ワーカーの場合はプロセス起動のコストを避ける
+    if workers == 1:
+        for i, file_bytes in enumerate(pdf_bytes_list):
+            yield _extract_job(i, file_bytes)
+        return
+
+    # 📌 Streamlitのサーバーはマルチスレッドのため、forkではなくspawnでワーカーを起動する（forkはデッドロックしうる）
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = {executor.submit(_extract_job, i, file_bytes): i for i, file_bytes in enumerate(pdf_bytes_list)}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except BrokenProcessPool as e:
+                # ワーカーが強制終了された場合（巨大なPDFでのメモリ不足など）、残りのファイルは失敗として返す
+                yield futures[future], None, f"{type(e).__name__}: {e}"
+
+
+def _collect_pdf_paths(inputs):
+    paths = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith('.pdf'):
+                    paths.append(os.path.join(path, name))
+        else:
+            paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    """PDFを一括でテキスト化するコマンドラインエントリポイント"""
+    parser = argparse.ArgumentParser(description="Extract claim text from J-PlatPat PDF files in parallel.")
+    parser.add_argument("inputs", nargs="+", help="PDF files or directories containing PDF files")
+    parser.add_argument("-o", "--output-dir", default="extracted", help="directory to write <name>.txt files")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--cache-dir", default=None, help="extraction cache directory shared with the app")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the extraction cache")
+    args = parser.parse_args(argv)
+
+    paths = _collect_pdf_paths(args.inputs)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    cache = None
+    if not args.no_cache:
+        from extraction_cache import ExtractionCache, DEFAULT_CACHE_DIR
+        cache = ExtractionCache(args.cache_dir or DEFAULT_CACHE_DIR)
+
+    def write_text(path, text):
+        name = os.path.splitext(os.path.basename(path))[0]
+        with open(os.path.join(args.output_dir, f"{name}.txt"), 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    # 📌 キャッシュ済みのPDFは書き出すだけにし、残りを並列抽出する
+    pending_paths = []
+    pending_hashes = []
+    pending_bytes = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            file_bytes = f.read()
+        file_hash = hash_pdf_bytes(file_bytes)
+        text = cache.get_text(file_hash) if cache is not None else None
+        if text is None:
+            pending_paths.append(path)
+            pending_hashes.append(file_hash)
+            pending_bytes.append(file_bytes)
+        else:
+            write_text(path, text)
+    print(f"{len(paths)-len(pending_paths)} cached, {len(pending_paths)} to extract", file=sys.stderr)
+
+    total_files = len(pending_paths)
+    failed_paths = []
+    for done, (i, text, error) in enumerate(extract_texts_parallel(pending_bytes, args.workers), start=1):
+        if error is not None:
+            failed_paths.append(pending_paths[i])
+            print(f"[{done}/{total_files}] {pending_paths[i]}: failed ({error})", file=sys.stderr)
+            continue
+        if cache is not None:
+            cache.put_text(pending_hashes[i], text)
+        write_text(pending_paths[i], text)
+        print(f"[{done}/{total_files}] {pending_paths[i]}", file=sys.stderr)
+
+    # 📌 失敗したファイルは最後にまとめて表示し、終了コードで知らせる
+    if failed_paths:
+        print(f"{len(failed_paths)} of {len(paths)} files failed:", file=sys.stderr)
+        for path in failed_paths:
+            print(f"  {path}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+# profiling.py
+
+import io
+import os
+import json
+import time
+import marshal
+import pstats
+import cProfile
+import functools
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# 設定すると、実行ごとの計測結果をこのファイルにJSON Lines形式で追記する
+PROFILE_LOG_PATH = os.environ.get("PATENT_ANALYSIS_PROFILE_LOG")
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+# Streamlitはセッションごとに別のスレッドでスクリプトを実行するため、計測中の実行はスレッドごとに持つ
+_local = threading.local()
+
+
+def rss_bytes():
+    """現在の常駐メモリ（/proc/self/statmから取得。取得できない場合はNone）"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class Profiler:
+    """
+    1回の実行の処理ごとの時間、呼び出し回数、メモリ増減を記録する。
+
+    同じ名前の処理は合算する。処理が入れ子になっている場合は、外側の時間に内側の時間も含まれる。
+    """
+
+    def __init__(self, capture=False):
+        """
+        Args:
+            capture (bool): cProfileで関数ごとの統計も取得する
+        """
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self.stages = {}  # 処理名 → {'calls', 'seconds', 'memory_bytes'}
+        self.cprofile = cProfile.Profile() if capture else None
+        if self.cprofile is not None:
+            self.cprofile.enable()
+
+    @contextmanager
+    def stage(self, name):
+        """処理をwith文で囲んで計測する"""
+        start_memory = rss_bytes()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            end_memory = rss_bytes()
+            record = self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'memory_bytes': 0})
+            record['calls'] += 1
+            record['seconds'] += seconds
+            if start_memory is not None and end_memory is not None:
+                record['memory_bytes'] += end_memory - start_memory
+
+    def finish(self):
+        """計測を終了する（cProfileも停止する）"""
+        self.elapsed = time.perf_counter() - self.started
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        return self
+
+    def records(self):
+        """
+        処理ごとの計測結果を時間の長い順に返す。
+
+        Returns:
+            list: Stage, Calls, Time (ms), Memory (MB) を持つ辞書のリスト
+        """
+        rows = [
+            {
+                'Stage': name,
+                'Calls': record['calls'],
+                'Time (ms)': round(record['seconds'] * 1000, 1),
+                'Memory (MB)': round(record['memory_bytes'] / 1024 / 1024, 1),
+            }
+            for name, record in self.stages.items()
+        ]
+        return sorted(rows, key=lambda row: row['Time (ms)'], reverse=True)
+
+    def cprofile_stats(self, limit=50):
+        """
+        cProfileの結果を返す。
+
+        Returns:
+            tuple: (pstats形式のバイナリ, 累積時間順の上位limit件のテキスト)。取得していない場合はNone
+        """
+        if self.cprofile is None:
+            return None
+        stats = pstats.Stats(self.cprofile)
+        data = marshal.dumps(stats.stats)  # pstats.Stats.dump_statsと同じ形式
+        text = io.StringIO()
+        stats.stream = text
+        stats.sort_stats('cumulative').print_stats(limit)
+        return data, text.getvalue()
+
+    def to_dict(self, **extra):
+        """JSONに変換できる計測結果（extraはそのまま追加する）"""
+        return {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'total_ms': round((self.elapsed or 0) * 1000, 1),
+            'stages': {row.pop('Stage'): row for row in self.records()},
+            **extra,
+        }
+
+    def write_log(self, path=PROFILE_LOG_PATH, **extra):
+        """計測結果をJSON Lines形式で追記する（pathが未設定の場合は何もしない）"""
+        if not path:
+            return
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.to_dict(**extra), ensure_ascii=False) + '\n')
+
+
+def start_run(capture=False):
+    """このスレッドの実行の計測を開始する"""
+    _local.profiler = Profiler(capture)
+    return _local.profiler
+
+
+def finish_run():
+    """このスレッドの実行の計測を終了し、Profilerを返す"""
+    profiler = getattr(_local, 'profiler', None)
+    _local.profiler = None
+    return profiler.finish() if profiler is not None else None
+
+
+@contextmanager
+def stage(name):
+    """
+    計測中の実行に処理を記録する（計測していない場合は何もしない）。
+
+    例:
+        with stage('csv.load'):
+            df = load_dataset(...)
+    """
+    profiler = getattr(_local, 'profiler', None)
+    if profiler is None:
+        yield
+        return
+    with profiler.stage(name):
+        yield
+
+
+def timed(name):
+    """関数の呼び出しをstageとして記録するデコレータ"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
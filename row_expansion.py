@@ -0,0 +1,27 @@
+# row_expansion.py
+
+import numpy as np
+
+
+def expand_rows(string_ids, owners, num_strings):
+    """
+    重複を除いた文字列ごとの値（分割したFIコードや出願人など）を、元の行に展開する。
+
+    値の処理は重複を除いた文字列に対してだけ行い、この関数で行ごとの結果に戻す。行ごとのループは使わない。
+
+    Args:
+        string_ids (np.ndarray): 行ごとの文字列番号（pd.factorizeの結果）
+        owners (np.ndarray): 値ごとに、その値が属する文字列番号（文字列番号の順に並んでいること）
+        num_strings (int): 重複を除いた文字列の数
+
+    Returns:
+        tuple:
+            np.ndarray: 展開後の各値の元の行番号
+            np.ndarray: 展開後の各値の、ownersの中での位置
+    """
+    counts = np.bincount(owners, minlength=num_strings)  # 文字列ごとの値の数
+    offsets = np.cumsum(counts) - counts  # 文字列ごとの最初の値の位置
+    lengths = counts[string_ids]
+    rows = np.repeat(np.arange(len(string_ids)), lengths)
+    within = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)  # 行の中での値の順番
+    return rows, offsets[string_ids][rows] + within
@@ -0,0 +1,321 @@
+# search_index.py
+
+import os
+import re
+import sys
+import json
+import math
+import time
+import zlib
+import sqlite3
+import threading
+from array import array
+
+import numpy as np
+
+# 索引の対象とするセクション
+INDEXED_SECTIONS = ('課題', '解決手段', '特許請求の範囲')
+# クエリで使えるセクション指定（例: claims:半導体）
+SECTION_ALIASES = {
+    'subject': '課題', '課題': '課題',
+    'solution': '解決手段', '解決手段': '解決手段',
+    'claims': '特許請求の範囲', 'claim': '特許請求の範囲', '請求項': '特許請求の範囲',
+}
+
+# 索引がメモリ上で使う大きさの上限（環境変数で上書き可能）
+DEFAULT_MAX_BYTES = int(os.environ.get("PATENT_ANALYSIS_SEARCH_INDEX_MB", "256")) * 1024 * 1024
+# 大きさの見積もりに使う、n-gram1つ分の配列と辞書のエントリ、配列の値1つ分のバイト数
+_POSTINGS_BYTES = sys.getsizeof(array('i')) + 3 * 8
+_CODE_BYTES = array('i').itemsize
+
+# BM25のパラメータ
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r'(-)?(?:([^\s:"]+):)?(?:"([^"]+)"|(\S+))')
+
+
+def char_ngrams(text, n=2):
+    """文字n-gramの集合を返す（空白で区切られない日本語向け）"""
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class Query:
+    """
+    検索クエリの解析結果。
+
+    語はスペース区切りでAND、`OR` で区切った語はOR、先頭の `-` は除外、
+    `"..."` はフレーズ、`claims:語` のようにセクションを指定できる。
+    """
+    __slots__ = ('groups', 'excluded')
+
+    def __init__(self, groups, excluded):
+        self.groups = groups  # ANDで結ぶグループのリスト。各グループは (語, セクション) のORのリスト
+        self.excluded = excluded  # 除外する (語, セクション) のリスト
+
+    @property
+    def terms(self):
+        """ハイライト用に、除外以外の語を返す"""
+        return [term for group in self.groups for term, _ in group]
+
+
+def parse_query(query):
+    """検索クエリ文字列をQueryに変換する"""
+    groups = []
+    excluded = []
+    join_next = False
+    for m in _TOKEN_RE.finditer(query):
+        negated, field, phrase, word = m.groups()
+        if phrase is None and word == 'OR' and not negated and field is None:
+            join_next = len(groups) > 0
+            continue
+        term = (phrase if phrase is not None else word).lower()
+        section = SECTION_ALIASES.get(field.lower()) if field else None
+        if field and section is None:  # セクション名でない場合は語の一部として扱う
+            term = f"{field.lower()}:{term}"
+        if negated:
+            excluded.append((term, section))
+        elif join_next:
+            groups[-1].append((term, section))
+        else:
+            groups.append([(term, section)])
+        join_next = False
+    return Query(groups, excluded)
+
+
+class SearchIndex:
+    """
+    解析済みセクションに対する文字n-gramの転置索引。
+
+    n-gramで候補文書を絞り込んでから本文で照合するため、フレーズ検索も正確に行える。
+    文書は内容ハッシュで登録し、登録済みの文書は再度索引しない。
+    ファイルには文書ごとの本文だけをSQLiteに保存し（保存時は追加・削除した文書だけを書き込む）、
+    転置索引は読み込み時に作り直す。
+    転置索引はn-gramごとに「doc_id × セクション数 + セクション番号」の昇順の整数配列で持つ
+    （文書とセクションの組ごとに4バイト。集合やタプルのキーよりもメモリが少ない）。
+    メモリ上の大きさが上限を超えた場合は、最近使われていない文書から削除する（evict）。
+    """
+
+    def __init__(self, path=None, n=2, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.n = n
+        self.max_bytes = max_bytes
+        self.size_bytes = 0  # 本文と転置索引のメモリ上の大きさ（見積もり）
+        self._docs = {}  # doc_id → {セクション: 小文字化した本文}
+        self._ids = {}  # 内容ハッシュ → doc_id（最近使われた文書ほど後ろ）
+        self._postings = {}  # n-gram → doc_idとセクション番号を組み合わせた値の昇順の配列（array('i')）
+        self._next_id = 0
+        self._added = {}  # 未保存の追加（内容ハッシュ → 本文）
+        self._removed = set()  # 未保存の削除（内容ハッシュ）
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path, n=2, max_bytes=DEFAULT_MAX_BYTES):
+        """保存済みの索引を読み込む。存在しない場合は空の索引を作成する"""
+        index = cls(path, n, max_bytes)
+        index._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with index._lock, index._conn:
+            index._conn.execute("PRAGMA journal_mode=WAL")
+            index._conn.execute("CREATE TABLE IF NOT EXISTS documents (hash TEXT PRIMARY KEY, sections BLOB NOT NULL)")
+            rows = index._conn.execute("SELECT hash, sections FROM documents").fetchall()
+            for doc_hash, blob in rows:
+                index._insert(doc_hash, json.loads(zlib.decompress(blob).decode('utf-8')))
+        index.evict()  # 上限を下げた場合は、次の保存でファイルからも削除される
+        return index
+
+    def save(self):
+        """前回の保存以降に追加・削除した文書をファイルに反映する"""
+        if self._conn is None:
+            return
+        with self._lock, self._conn:
+            if self._removed:
+                self._conn.executemany("DELETE FROM documents WHERE hash=?", [(doc_hash,) for doc_hash in self._removed])
+            if self._added:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO documents (hash, sections) VALUES (?, ?)",
+                    [(doc_hash, zlib.compress(json.dumps(texts, ensure_ascii=False).encode('utf-8')))
+                     for doc_hash, texts in self._added.items()])
+            self._added = {}
+            self._removed = set()
+
+    def __contains__(self, doc_hash):
+        return doc_hash in self._ids
+
+    def __len__(self):
+        return len(self._docs)
+
+    def hashes(self):
+        """登録済みの文書の内容ハッシュ"""
+        with self._lock:
+            return list(self._ids)
+
+    def _section_codes(self, doc_id, texts):
+        # 文書の各セクションについて、転置索引に登録する値と本文を返す
+        return [(doc_id * len(INDEXED_SECTIONS) + i, texts[section])
+                for i, section in enumerate(INDEXED_SECTIONS) if section in texts]
+
+    def _insert(self, doc_hash, texts):
+        # 本文（小文字化済み）を登録し、n-gramの転置索引に追加する（ロック内で呼ぶ）
+        doc_id = self._next_id
+        self._next_id += 1
+        # 📌 doc_idは増える一方なので、末尾に追加するだけで配列は昇順に保たれる
+        for code, text in self._section_codes(doc_id, texts):
+            grams = char_ngrams(text, self.n)
+            for gram in grams:
+                postings = self._postings.get(gram)
+                if postings is None:
+                    self._postings[gram] = array('i', (code,))
+                    self.size_bytes += sys.getsizeof(gram) + _POSTINGS_BYTES
+                else:
+                    postings.append(code)
+            self.size_bytes += sys.getsizeof(text) + len(grams) * _CODE_BYTES
+        self._docs[doc_id] = texts
+        self._ids[doc_hash] = doc_id
+
+    def add(self, doc_hash, sections):
+        """
+        文書を索引に追加する。登録済みの場合は何もしない。
+
+        Args:
+            doc_hash (str): 文書の内容ハッシュ
+            sections (dict): セクション名 → 本文（INDEXED_SECTIONS以外は無視する）
+        """
+        with self._lock:
+            if doc_hash in self._ids:
+                return
+            texts = {section: sections[section].lower() for section in INDEXED_SECTIONS if sections.get(section)}
+            self._insert(doc_hash, texts)
+            self._added[doc_hash] = texts
+            self._removed.discard(doc_hash)
+
+    def remove(self, doc_hashes):
+        """
+        文書を索引から削除する。未登録の内容ハッシュは無視する。
+
+        Returns:
+            int: 削除した文書数
+        """
+        with self._lock:
+            return sum(self._remove(doc_hash) for doc_hash in doc_hashes if doc_hash in self._ids)
+
+    def _remove(self, doc_hash):
+        # 文書を索引から削除する（ロック内で呼ぶ）
+        doc_id = self._ids.pop(doc_hash)
+        texts = self._docs.pop(doc_id)
+        # 📌 文書の本文のn-gramから、転置索引のエントリを取り除く
+        for code, text in self._section_codes(doc_id, texts):
+            grams = char_ngrams(text, self.n)
+            for gram in grams:
+                postings = self._postings[gram]
+                postings.remove(code)
+                if not postings:
+                    del self._postings[gram]
+                    self.size_bytes -= sys.getsizeof(gram) + _POSTINGS_BYTES
+            self.size_bytes -= sys.getsizeof(text) + len(grams) * _CODE_BYTES
+        self._added.pop(doc_hash, None)
+        self._removed.add(doc_hash)
+        return 1
+
+    def evict(self, keep=()):
+        """
+        メモリ上の大きさが上限以下になるまで、最近使われていない文書から削除する。
+
+        Args:
+            keep (list): 使用中の文書の内容ハッシュ（最近使われた文書として扱い、削除しない）
+
+        Returns:
+            int: 削除した文書数
+        """
+        with self._lock:
+            keep = [doc_hash for doc_hash in dict.fromkeys(keep) if doc_hash in self._ids]
+            for doc_hash in keep:  # 末尾に移動する
+                self._ids[doc_hash] = self._ids.pop(doc_hash)
+            removed = 0
+            evictable = list(self._ids)[:len(self._ids) - len(keep)]
+            for doc_hash in evictable:
+                if self.size_bytes <= self.max_bytes:
+                    break
+                removed += self._remove(doc_hash)
+        return removed
+
+    def _candidates(self, term, sections):
+        # 📌 語の全n-gramを含む文書だけを候補にする（nより短い語は全文書が候補）
+        if len(term) < self.n:
+            return set(self._docs)
+        postings = [self._postings.get(gram) for gram in char_ngrams(term, self.n)]
+        if any(p is None for p in postings):
+            return set()
+        # 📌 同じ文書の同じセクションは同じ値になるため、配列の共通部分が全n-gramを含むセクションになる
+        postings.sort(key=len)
+        codes = np.frombuffer(postings[0], dtype=np.intc)
+        for p in postings[1:]:
+            codes = np.intersect1d(codes, np.frombuffer(p, dtype=np.intc), assume_unique=True)
+        section_ids = [INDEXED_SECTIONS.index(section) for section in sections]
+        codes = codes[np.isin(codes % len(INDEXED_SECTIONS), section_ids)]
+        return set((codes // len(INDEXED_SECTIONS)).tolist())
+
+    def _term_frequencies(self, term, section, scope):
+        sections = (section,) if section else scope
+        tf = {}
+        for doc_id in self._candidates(term, sections):
+            count = sum(self._docs[doc_id].get(s, '').count(term) for s in sections)
+            if count > 0:
+                tf[doc_id] = count
+        return tf
+
+    def search(self, query, sections=None, doc_hashes=None, limit=None):
+        """
+        クエリに一致する文書をBM25のスコア順に返す。
+
+        Args:
+            query (str | Query): 検索クエリ
+            sections (list): 検索対象のセクション（Noneの場合はすべて）
+            doc_hashes (list): 検索対象を限定する内容ハッシュ（Noneの場合は索引全体）
+            limit (int): 返す件数の上限
+
+        Returns:
+            tuple: ([(内容ハッシュ, スコア), ...], 検索時間[ms])
+        """
+        started = time.perf_counter()
+        if isinstance(query, str):
+            query = parse_query(query)
+        scope = tuple(sections) if sections else INDEXED_SECTIONS
+        with self._lock:
+            hashes = list(self._ids) if doc_hashes is None else [h for h in doc_hashes if h in self._ids]
+            allowed = {self._ids[h]: h for h in hashes}
+            if len(query.groups) == 0 or len(allowed) == 0:
+                return [], (time.perf_counter() - started) * 1000
+
+            doc_lengths = {doc_id: sum(len(self._docs[doc_id].get(s, '')) for s in scope) for doc_id in allowed}
+            avg_length = max(sum(doc_lengths.values()) / len(doc_lengths), 1)
+            num_docs = len(allowed)
+
+            # 📌 ANDの各グループについて、OR条件に一致する文書を絞り込む
+            matched = set(allowed)
+            term_tfs = []
+            for group in query.groups:
+                group_docs = set()
+                for term, section in group:
+                    tf = {d: c for d, c in self._term_frequencies(term, section, scope).items() if d in allowed}
+                    term_tfs.append(tf)
+                    group_docs |= tf.keys()
+                matched &= group_docs
+                if not matched:
+                    break
+            for term, section in query.excluded:
+                matched -= self._term_frequencies(term, section, scope).keys()
+
+            # 📌 BM25でスコアを計算する
+            scores = {}
+            for tf in term_tfs:
+                idf = math.log((num_docs - len(tf) + 0.5) / (len(tf) + 0.5) + 1)
+                for doc_id, count in tf.items():
+                    if doc_id in matched:
+                        norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths[doc_id] / avg_length)
+                        scores[doc_id] = scores.get(doc_id, 0) + idf * count * (BM25_K1 + 1) / (count + norm)
+
+            results = sorted(((allowed[d], scores.get(d, 0.0)) for d in matched), key=lambda r: r[1], reverse=True)
+        if limit is not None:
+            results = results[:limit]
+        return results, (time.perf_counter() - started) * 1000
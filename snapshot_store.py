@@ -0,0 +1,129 @@
+# snapshot_store.py
+
+import os
+import re
+import json
+import shutil
+from datetime import datetime
+
+import pandas as pd
+
+from extraction_cache import DEFAULT_CACHE_DIR
+
+# スナップショットの保存先（環境変数で上書き可能）
+DEFAULT_SNAPSHOT_DIR = os.environ.get("PATENT_ANALYSIS_SNAPSHOT_DIR", os.path.join(DEFAULT_CACHE_DIR, "snapshots"))
+
+_METADATA_FILE = "metadata.json"
+
+
+def _snapshot_path(name, snapshot_dir):
+    # ファイル名に使えない文字は置き換える
+    safe_name = re.sub(r'[^\w\-.]', '_', name).strip('.')
+    if not safe_name:
+        raise ValueError(f"Invalid snapshot name: {name!r}")
+    return os.path.join(snapshot_dir, safe_name)
+
+
+def _read_metadata(path):
+    # メタデータを読み込む。存在しない・壊れている場合はNone
+    try:
+        with open(os.path.join(path, _METADATA_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def list_snapshots(snapshot_dir=DEFAULT_SNAPSHOT_DIR):
+    """
+    保存済みのスナップショットを新しい順に返す。
+
+    Returns:
+        list: (スナップショット名, メタデータ) のリスト
+    """
+    if not os.path.isdir(snapshot_dir):
+        return []
+    snapshots = []
+    for name in os.listdir(snapshot_dir):
+        # 📌 書き込み途中や壊れたスナップショットは一覧に含めない
+        metadata = _read_metadata(os.path.join(snapshot_dir, name))
+        if isinstance(metadata, dict) and 'created' in metadata and 'tables' in metadata:
+            snapshots.append((name, metadata))
+    snapshots.sort(key=lambda s: s[1].get('created', ''), reverse=True)
+    return snapshots
+
+
+def save_snapshot(name, tables, metadata=None, snapshot_dir=DEFAULT_SNAPSHOT_DIR):
+    """
+    分析用に準備したテーブルをArrow IPC（Feather v2）形式で保存する。
+
+    読み込み時にメモリマップできるように圧縮はしない。同名のスナップショットは置き換える。
+    ファイル名に使えない文字を置き換えた結果が別のスナップショットと同じになる名前（"a b" と "a_b" など）はエラーにする。
+
+    Args:
+        name (str): スナップショット名
+        tables (dict): テーブル名 → DataFrame
+        metadata (dict): 日付列などの付加情報（JSONに変換できること）
+
+    Returns:
+        str: 保存したディレクトリ
+
+    Raises:
+        ValueError: 名前が空の場合、または別のスナップショットと保存先が重なる場合
+    """
+    # pyarrowはスナップショットを保存・読み込みするときにだけインポートする（一覧の表示には不要）
+    import pyarrow.feather as feather
+
+    path = _snapshot_path(name, snapshot_dir)
+    existing = _read_metadata(path)
+    if isinstance(existing, dict) and existing.get('name', name) != name:
+        raise ValueError(f"Snapshot name {name!r} conflicts with the existing snapshot {existing['name']!r}")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for table_name, df in tables.items():
+        feather.write_feather(df.reset_index(drop=True), os.path.join(tmp_path, f"{table_name}.arrow"), compression='uncompressed')
+    metadata = dict(metadata or {})
+    metadata.update({
+        'name': name,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'tables': {table_name: len(df) for table_name, df in tables.items()},
+    })
+    with open(os.path.join(tmp_path, _METADATA_FILE), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    # 📌 書き込みが完了してから置き換える
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _string_types(arrow_type):
+    # 文字列列はArrowのバッファを参照したままpandasに渡す（Pythonの文字列オブジェクトを作らない）
+    import pyarrow as pa
+
+    if arrow_type in (pa.string(), pa.large_string()):
+        return pd.StringDtype("pyarrow")
+    return None
+
+
+def load_snapshot(name, snapshot_dir=DEFAULT_SNAPSHOT_DIR):
+    """
+    スナップショットをメモリマップで読み込む。
+
+    Returns:
+        tuple: (テーブル名 → DataFrame, メタデータ)
+    """
+    import pyarrow.feather as feather
+
+    path = _snapshot_path(name, snapshot_dir)
+    with open(os.path.join(path, _METADATA_FILE), encoding='utf-8') as f:
+        metadata = json.load(f)
+    tables = {}
+    for table_name in metadata['tables']:
+        table = feather.read_table(os.path.join(path, f"{table_name}.arrow"), memory_map=True)
+        tables[table_name] = table.to_pandas(types_mapper=_string_types)
+    return tables, metadata
+
+
+def delete_snapshot(name, snapshot_dir=DEFAULT_SNAPSHOT_DIR):
+    """スナップショットを削除する"""
+    shutil.rmtree(_snapshot_path(name, snapshot_dir), ignore_errors=True)
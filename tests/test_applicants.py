@@ -0,0 +1,70 @@
+# test_applicants.py
+
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from applicants import _SPLIT_RE, applicant_key, build_applicant_tables, normalize_applicant_name
+
+
+# 📌 行ごとに分割・正規化する素朴な実装（比較の基準）
+def row_by_row_tables(applicant_strings, aliases):
+    row_keys = []
+    names_by_key = Counter()
+    for string in applicant_strings:
+        seen = {}
+        tokens = [] if string is None or string != string else _SPLIT_RE.split(string)  # 欠損（None, NaN）は出願人なし
+        for token in tokens:
+            name = normalize_applicant_name(token)
+            key = applicant_key(name)
+            if key in aliases:
+                name = aliases[key]
+                key = applicant_key(name)
+            if name and key not in seen:
+                seen[key] = name
+        row_keys.append(list(seen))
+        names_by_key.update(seen.items())
+    keys = sorted({key for keys in row_keys for key in keys})
+    key_ids = {key: i for i, key in enumerate(keys)}
+    bridge = [(row, key_ids[key]) for row, keys in enumerate(row_keys) for key in keys]
+    # 表示名は最も多く使われている表記（同数の場合は文字列の順で先のもの）
+    display_names = [min((-count, name) for (k, name), count in names_by_key.items() if k == key)[1] for key in keys]
+    return display_names, bridge
+
+
+def random_applicant_strings(rng, n_rows):
+    """法人格の位置と種類、略記、全角・半角、区切り文字の表記ゆれと、空欄・欠損を含む出願人/権利者"""
+    companies = ['キヤノン', 'ソニーグループ', 'トヨタ自動車', 'ＮＥＣ', 'NEC', 'テクノ1', 'テクノ2']
+    forms = ['{}株式会社', '株式会社{}', '{}(株)', '{}㈱', ' {} 株式会社 ', '{}有限会社']
+    separators = ['、', ',', '，', ';']
+    strings = []
+    for _ in range(n_rows):
+        if rng.random() < 0.05:
+            strings.append(None if rng.random() < 0.5 else np.nan)
+            continue
+        names = [forms[rng.integers(len(forms))].format(companies[rng.integers(len(companies))]) for _ in range(rng.integers(1, 4))]
+        if rng.random() < 0.1:
+            names.append('')
+        strings.append(separators[rng.integers(len(separators))].join(names))
+    return strings
+
+
+def test_build_applicant_tables_matches_row_by_row_normalization():
+    rng = np.random.default_rng(0)
+    applicant_strings = random_applicant_strings(rng, 2000)
+    aliases = {applicant_key('テクノ2株式会社'): 'テクノ1株式会社'}
+    applicants, bridge = build_applicant_tables(pd.Series(applicant_strings), aliases)
+
+    display_names, expected_bridge = row_by_row_tables(applicant_strings, aliases)
+    assert applicants['出願人ID'].tolist() == list(range(len(display_names)))
+    assert applicants['出願人'].tolist() == display_names
+    assert list(zip(bridge['行'].tolist(), bridge['出願人ID'].tolist())) == expected_bridge
+    assert not set(applicants['出願人']) & {'None', 'nan', ''}
+
+
+def test_applicant_key_ignores_only_the_position_of_the_legal_form():
+    assert applicant_key('株式会社テクノ1') == applicant_key('テクノ1株式会社') == applicant_key('ﾃｸﾉ1(株) ')
+    assert applicant_key('テクノ1有限会社') == applicant_key('有限会社テクノ1')
+    # 法人格の種類が異なる場合は別の出願人
+    assert len({applicant_key('テクノ1株式会社'), applicant_key('テクノ1有限会社'), applicant_key('テクノ1合同会社'), applicant_key('テクノ1')}) == 4
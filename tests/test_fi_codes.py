@@ -0,0 +1,83 @@
+# test_fi_codes.py
+
+import numpy as np
+import pandas as pd
+
+from fi_codes import FI_LEVELS, build_fi_table
+
+
+# 📌 build_fi_tableに置き換える前の、行ごとに処理する実装（比較の基準）
+def merge_fi_codes(fi_list):
+    merged_list = []
+    prev_fi = None
+    for fi in fi_list:
+        if fi.split('@')[0].isdigit() and prev_fi:  # 数字のみの場合、前のFIと結合
+            merged_list[-1] = f"{prev_fi}-{fi}"
+        else:
+            merged_list.append(fi)
+            prev_fi = fi
+    return merged_list
+
+
+def parse_fi_codes(fi_list):
+    sections = set()
+    classes = set()
+    subclasses = set()
+    groups = set()
+    for fi in fi_list:
+        parts = fi.split("/")
+        if len(parts) >= 2:
+            main_part = parts[0]
+            sections.add(main_part[0])
+            subclasses.add(main_part[:4])
+            if len(main_part) >= 3:
+                classes.add(main_part[:3])
+            groups.add(fi.split('-')[0].split('@')[0])
+    return sections, classes, subclasses, groups
+
+
+def random_fi_strings(rng, n_rows):
+    """数字のみのエントリ、ファセット、空のエントリ、"/"のないコードを含むFI文字列"""
+    codes = [
+        'H01L21/302', 'H01L21/302@A', 'G06F3/01', 'G06F16/00', 'A61B5/00@Z', 'B60W30/09',
+        'H04N5', 'G06N20/00', 'C', 'H01M10/052', 'H01M4/13@B',
+    ]
+    numerics = ['101', '102', '101@A', '9']
+    strings = []
+    for _ in range(n_rows):
+        entries = []
+        for _ in range(rng.integers(1, 6)):
+            kind = rng.random()
+            if kind < 0.6:
+                entries.append(codes[rng.integers(len(codes))])
+            elif kind < 0.9:
+                entries.append(numerics[rng.integers(len(numerics))])
+            else:
+                entries.append('')
+        strings.append(','.join(entries))
+    return strings
+
+
+def test_build_fi_table_matches_row_by_row_parsing():
+    rng = np.random.default_rng(0)
+    fi_strings = random_fi_strings(rng, 2000)
+    doc_numbers = pd.Series([f'特開2020-{i:06d}' for i in range(len(fi_strings))])
+    table = build_fi_table(doc_numbers, pd.Series(fi_strings))
+    rows = {doc_number: group for doc_number, group in table.groupby('文献番号', observed=True, sort=False)}
+
+    for doc_number, fi_string in zip(doc_numbers, fi_strings):
+        merged = merge_fi_codes(fi_string.split(','))
+        group = rows[doc_number]
+        assert group['FI'].astype('str').tolist() == merged
+        for level, expected in zip(FI_LEVELS, parse_fi_codes(merged)):
+            assert set(group[level].dropna().astype('str')) == expected, (fi_string, level)
+
+
+def test_build_fi_table_repeated_strings_expand_to_each_row():
+    # 同じFI文字列の行は、重複を除いた文字列の解析結果をそれぞれの行に展開する
+    doc_numbers = pd.Series(['A', 'B', 'C', 'D'])
+    fi_strings = pd.Series(['G06F3/01,101,102', 'H01L21/302', 'G06F3/01,101,102', ''])
+    table = build_fi_table(doc_numbers, fi_strings)
+    assert table['文献番号'].astype('str').tolist() == ['A', 'B', 'C', 'D']
+    assert table['FI'].astype('str').tolist() == ['G06F3/01-102', 'H01L21/302', 'G06F3/01-102', '']
+    assert table['グループ'].astype('str').tolist()[:3] == ['G06F3/01', 'H01L21/302', 'G06F3/01']
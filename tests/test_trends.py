@@ -0,0 +1,31 @@
+# test_trends.py
+
+import pandas as pd
+
+from trends import count_by_period
+
+
+def make_patents():
+    # 2019年に2件、2020年は0件、2021年に1件（最後の期間）、日付なしが1件
+    return pd.DataFrame({
+        '出願日': pd.to_datetime(['2019-01-10', '2019-12-31', '2021-06-01', None]),
+        'ステージ': ['登録', '公開', '登録', '公開'],
+    })
+
+
+def test_count_by_period_includes_the_last_and_empty_periods():
+    df_period = count_by_period(make_patents(), '出願日', 'Y', ['登録', '公開'])
+
+    assert list(df_period.index) == list(pd.period_range('2019', '2021', freq='Y'))
+    assert df_period['count'].tolist() == [2, 0, 1]
+    assert df_period['count_登録'].tolist() == [1, 0, 1]
+    assert df_period['count_公開'].tolist() == [1, 0, 0]
+
+
+def test_count_by_period_gives_zero_for_an_absent_stage():
+    df_period = count_by_period(make_patents(), '出願日', 'Q', ['拒絶'])
+
+    assert len(df_period) == 10  # 2019Q1 から 2021Q2 まで
+    assert df_period.index[-1] == pd.Period('2021Q2', freq='Q')
+    assert df_period['count'].sum() == 3
+    assert df_period['count_拒絶'].tolist() == [0] * 10
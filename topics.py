@@ -0,0 +1,119 @@
+# topics.py
+
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# クラスタリングに使う文章の列（CSVにある列だけを使う）
+TOPIC_TEXT_COLUMNS = ['要約', '請求の範囲']
+# n-gramに含めない文字（句読点、記号、数字）
+_NON_TERM_RE = re.compile(r'[\W\d_]+')
+# 文章のある行がこれより少ない場合は、1行にしか現れないn-gramも語彙に含める
+MIN_ROWS_FOR_MIN_DF = 50
+
+
+def _preprocess(text):
+    # 全角・半角を揃え、句読点や数字をまたぐn-gramを作らないように空白で区切る
+    return _NON_TERM_RE.sub(' ', unicodedata.normalize('NFKC', text)).lower()
+
+
+def topic_texts(df, columns=TOPIC_TEXT_COLUMNS):
+    """
+    クラスタリングに使う文章を行ごとに連結する。
+
+    Returns:
+        pd.Series: 行ごとの文章（対象の列がない場合はNone）
+    """
+    columns = [col for col in columns if col in df.columns]
+    if not columns:
+        return None
+    texts = df[columns[0]].fillna('').astype('str')
+    for col in columns[1:]:
+        texts = texts + '\n' + df[col].fillna('').astype('str')
+    return texts
+
+
+class TopicModel:
+    """
+    文字n-gramのTF-IDFとMiniBatchKMeansによる文献のクラスタリング結果。
+
+    labels は行ごとのクラスタ番号（文章が空の行は -1）。
+    """
+    __slots__ = ('vectorizer', 'model', 'labels')
+
+    def __init__(self, texts, n_clusters=8, ngram_range=(2, 3), max_features=50000, batch_size=4096, random_state=0):
+        """
+        Args:
+            texts (pd.Series): topic_textsで作成した文章
+            n_clusters (int): クラスタ数
+            ngram_range (tuple): 文字n-gramの長さの範囲
+            max_features (int): 語彙の上限（メモリ使用量を抑える）
+            batch_size (int): MiniBatchKMeansのバッチサイズ
+
+        Raises:
+            ValueError: 文章が空、または語彙になるn-gramがない場合
+        """
+        # scikit-learnは読み込みに数秒かかるため、クラスタリングするときにインポートする
+        from sklearn.cluster import MiniBatchKMeans
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        texts = texts.fillna('').astype('str')
+        has_text = (texts.str.strip().str.len() > 0).to_numpy()
+        texts = texts.to_numpy()
+        if not has_text.any():
+            raise ValueError("There is no text to cluster.")
+        # 📌 疎行列のTF-IDF（float32）にして、ミニバッチでクラスタリングする
+        self.vectorizer = TfidfVectorizer(
+            analyzer='char_wb', preprocessor=_preprocess, ngram_range=ngram_range, max_features=max_features,
+            min_df=2 if has_text.sum() >= MIN_ROWS_FOR_MIN_DF else 1, sublinear_tf=True, dtype=np.float32,
+            )
+        matrix = self.vectorizer.fit_transform(texts[has_text])
+        n_clusters = max(1, min(n_clusters, matrix.shape[0]))
+        self.model = MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size, n_init=3, random_state=random_state)
+        self.labels = np.full(len(texts), -1, dtype='int64')
+        self.labels[has_text] = self.model.fit_predict(matrix)
+
+    def top_terms(self, n=10):
+        """
+        クラスタごとに、重心での重みが大きいn-gramを返す。
+
+        Returns:
+            list: クラスタ番号の順に、n-gramのリスト
+        """
+        terms = self.vectorizer.get_feature_names_out()
+        order = np.argsort(-self.model.cluster_centers_, axis=1)[:, :n * 2]
+        # 単語の先頭と末尾の空白だけが異なるn-gramは1つにまとめる
+        return [list(dict.fromkeys(term.strip() for term in terms[row]))[:n] for row in order]
+
+    def cluster_names(self, n_terms=3):
+        """クラスタ番号 → 表示名（上位のn-gramを並べたもの）"""
+        return {k: f"{k}: {' / '.join(terms)}" for k, terms in enumerate(self.top_terms(n_terms))}
+
+    def sizes(self, rows=None):
+        """
+        クラスタごとの文献数を返す。
+
+        Args:
+            rows (np.ndarray): 対象の行番号（Noneの場合はすべて）
+        """
+        labels = self.labels if rows is None else self.labels[rows]
+        labels = labels[labels >= 0]
+        return pd.Series(np.bincount(labels, minlength=self.model.n_clusters), name='件数').rename_axis('クラスタ')
+
+    def counts_by(self, rows, keys):
+        """
+        クラスタ × キー（年など）の文献数を返す。
+
+        Args:
+            rows (np.ndarray): 対象の行番号
+            keys (pd.Series): rowsと同じ並びのキー
+
+        Returns:
+            pd.DataFrame: キーをインデックス、クラスタ番号を列とする表
+        """
+        labels = self.labels[rows]
+        valid = labels >= 0
+        counts = pd.crosstab(np.asarray(keys)[valid], labels[valid])
+        return counts.reindex(columns=range(self.model.n_clusters), fill_value=0)
@@ -0,0 +1,43 @@
+# trends.py
+
+import pandas as pd
+
+# 集計の粒度（表示名 → pandasの期間の頻度）
+GRANULARITIES = {'Year': 'Y', 'Quarter': 'Q', 'Month': 'M'}
+
+
+def count_by_period(df, date_col, freq='Y', stages=None, stage_col='ステージ'):
+    """
+    期間ごとの件数と、ステージごとの件数を1回のグループ集計で数える。
+
+    最初の期間から最後の期間まで、件数が0の期間も含めて返す。
+
+    Args:
+        df (pd.DataFrame): 集計対象のデータ
+        date_col (str): 期間の基準とする日付列
+        freq (str): 'Y'（年）, 'Q'（四半期）, 'M'（月）
+        stages (list): 件数を数えるステージ（Noneの場合はステージ別に数えない）
+        stage_col (str): ステージの列名
+
+    Returns:
+        pd.DataFrame: 期間（pd.Period）をインデックスとし、count と count_<ステージ> の列を持つ表
+    """
+    stages = list(stages or [])
+    columns = ['count'] + [f'count_{stage}' for stage in stages]
+    periods = df[date_col].dt.to_period(freq)
+    valid = periods.notna()
+    if not valid.any():
+        return pd.DataFrame(columns=columns, index=pd.PeriodIndex([], freq=freq, name='期間'), dtype='int64')
+    periods = periods[valid]
+    full_range = pd.period_range(periods.min(), periods.max(), freq=freq, name='期間')
+
+    # 📌 期間×ステージの件数を1回で集計し、全期間に揃える
+    counts = (
+        periods.groupby([periods, df.loc[valid, stage_col]], observed=True, dropna=False).size()
+        .unstack(fill_value=0)
+        .reindex(index=full_range, fill_value=0)
+    )
+    result = pd.DataFrame({'count': counts.sum(axis=1)}, index=full_range)
+    for stage in stages:
+        result[f'count_{stage}'] = counts[stage] if stage in counts.columns else 0
+    return result
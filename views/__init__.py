@@ -0,0 +1 @@
+# 📌 Streamlitのページ（main.pyが選択されたページのモジュールだけをimportする）
@@ -0,0 +1,242 @@
+# claim.py
+
+import os
+import html
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from pdf_extract import extract_texts_parallel, hash_pdf_bytes
+from claim_parser import PatentDocument, parse_document
+from highlighter import Highlighter
+from search_index import SearchIndex, INDEXED_SECTIONS, parse_query
+from near_duplicates import compute_signatures, find_families
+from profiling import stage, timed
+from views.common import get_extraction_cache, get_signature_cache
+
+
+# 📌 全文検索の索引を抽出キャッシュと同じディレクトリに保存する（セッション間で共有）
+@st.cache_resource
+def get_search_index():
+    """ディスク上の全文検索索引を開く"""
+    return SearchIndex.load(os.path.join(get_extraction_cache().cache_dir, "search_index.sqlite3"))
+
+# 📌 解析済みの文書をキャッシュから復元し、なければ解析してキャッシュに保存する関数
+@timed('claims.parse')
+def load_document(extraction_cache, file_hash, text):
+    doc = PatentDocument.from_dict(text, extraction_cache.get_sections(file_hash))
+    if doc is None:
+        doc = parse_document(text)
+        extraction_cache.put_sections(file_hash, doc.to_dict())
+    return doc
+
+# 📌 1文書分のセクションと請求項をハイライトして表示する関数
+@timed('claims.render')
+def render_claim_document(doc, highlighter):
+    for section_name in ('課題', '解決手段', '選択図'):
+        section_text = doc.section(section_name)
+        if section_text is None:
+            continue
+        if section_name != '選択図':
+            section_text, _ = highlighter.highlight(section_text)  # 🔍 ハイライト処理（HTMLはエスケープされる）
+        else:
+            section_text = html.escape(section_text, quote=False)  # 📌 PDFのテキストをHTMLとして解釈させない
+        st.markdown(f'**【{section_name}】**<br>{section_text}', unsafe_allow_html=True)
+
+    if '特許請求の範囲' in doc.spans:
+        # 請求項はまとめて1回のmarkdownで描画する
+        claim_texts = [highlighter.highlight(doc.claim_text(claim))[0] for claim in doc.claims]  # 🔍 ハイライト処理
+        st.markdown('**【特許請求の範囲】**<br>' + '<br>'.join(claim_texts), unsafe_allow_html=True)
+
+    if doc.missing:
+        st.caption(f"Sections not found: {', '.join(doc.missing)}")
+
+def render():
+    """Claimページ（公報PDFの請求項の表示と検索）"""
+    st.title("Claim")
+    file_pdfs = st.file_uploader("Upload PDF files", type='pdf', accept_multiple_files=True)
+
+    total_files = len(file_pdfs)  # 全ファイル数
+
+    pdf_name_list = []
+    pdf_hash_list = []
+
+    if len(file_pdfs)>0:
+        # 📌 ファイルのバイナリデータを取得し、キャッシュ済みでないものだけを抽出対象にする
+        extraction_cache = get_extraction_cache()
+        claim_documents = st.session_state.get('claim_documents', {})  # ハッシュキー → 解析済み文書（再実行時は再解析しない）
+        claim_failures = st.session_state.get('claim_failures', {})  # ハッシュキー → 抽出に失敗した理由（再実行時は再抽出しない）
+        # 📌 ファイルのハッシュはアップロードごとに1回だけ計算する（再実行のたびに全PDFを読み直さない）
+        file_hash_cache = st.session_state.setdefault('pdf_file_hashes', {})
+        pending_hashes = []
+        pending_bytes = []
+        for file_pdf in file_pdfs:
+            if file_pdf.file_id not in file_hash_cache:
+                file_hash_cache[file_pdf.file_id] = hash_pdf_bytes(file_pdf.getvalue())
+            file_hash = file_hash_cache[file_pdf.file_id]
+            pdf_name_list.append(file_pdf.name)
+            pdf_hash_list.append(file_hash)
+            if file_hash in claim_documents or file_hash in claim_failures or file_hash in pending_hashes:
+                continue
+            extracted_text = extraction_cache.get_text(file_hash)
+            if extracted_text is None:
+                pending_hashes.append(file_hash)
+                pending_bytes.append(file_pdf.getvalue())
+            else:
+                claim_documents[file_hash] = load_document(extraction_cache, file_hash, extracted_text)
+
+        if len(pending_bytes)>0:
+            extract_bar = st.progress(0)  # プログレスバーの追加
+            with st.spinner('Loading...'):
+                # 📌 プロセスプールで並列に抽出し、完了した順にプログレスバーを更新
+                with stage('pdf.extract'):
+                    for done, (j, extracted_text, error) in enumerate(extract_texts_parallel(pending_bytes), start=1):
+                        if error is not None:
+                            claim_failures[pending_hashes[j]] = error
+                        else:
+                            extraction_cache.put_text(pending_hashes[j], extracted_text)
+                            claim_documents[pending_hashes[j]] = load_document(extraction_cache, pending_hashes[j], extracted_text)
+                        extract_bar.progress(done/len(pending_bytes), f"Extracting {done}/{len(pending_bytes)}")
+            extract_bar.empty()  # すべての処理が完了したらプログレスバーを消す
+
+        # 📌 抽出できなかったファイルは一覧を表示し、以降の処理から除く（アップロードから外されたファイルの失敗は忘れる）
+        claim_failures = {file_hash: claim_failures[file_hash] for file_hash in pdf_hash_list if file_hash in claim_failures}
+        st.session_state['claim_failures'] = claim_failures
+        failed_files = [(name, claim_failures[file_hash]) for name, file_hash in zip(pdf_name_list, pdf_hash_list) if file_hash in claim_failures]
+        if failed_files:
+            st.warning(f"{len(failed_files)} of {total_files} files could not be read and were skipped:\n\n"
+                       + '\n'.join(f"- {name}: {error}" for name, error in failed_files))
+            pdf_name_list = [name for name, file_hash in zip(pdf_name_list, pdf_hash_list) if file_hash not in claim_failures]
+            pdf_hash_list = [file_hash for file_hash in pdf_hash_list if file_hash not in claim_failures]
+            total_files = len(pdf_hash_list)
+
+        # アップロードから外されたファイルの文書は破棄する
+        claim_documents = {file_hash: claim_documents[file_hash] for file_hash in pdf_hash_list}
+        st.session_state['claim_documents'] = claim_documents
+
+        # 📌 新しい文書だけを全文検索の索引に追加する
+        search_index = get_search_index()
+        with stage('search.index'):
+            new_hashes = [file_hash for file_hash in claim_documents if file_hash not in search_index]
+            for file_hash in new_hashes:
+                search_index.add(file_hash, {section_name: claim_documents[file_hash].section(section_name) for section_name in INDEXED_SECTIONS})
+            # 📌 抽出キャッシュから削除された文書は索引からも削除する（索引の大きさを抽出キャッシュの上限に揃える）
+            # 抽出キャッシュの削除は追加のときにだけ起きるため、新しい文書があった場合だけ確認する
+            if new_hashes:
+                indexed_hashes = search_index.hashes()
+                search_index.remove(set(indexed_hashes) - extraction_cache.existing(indexed_hashes) - set(pdf_hash_list))
+                # 📌 索引のメモリ上の大きさが上限を超えた場合は、アップロード中でない古い文書から削除する
+                search_index.evict(keep=pdf_hash_list)
+            search_index.save()
+
+        # 📌 課題・解決手段・請求の範囲がほぼ同じ文書を同じファミリーにまとめる（署名は文書のハッシュでキャッシュ）
+        with stage('families.detect'):
+            claim_signatures, _ = compute_signatures(
+                pdf_hash_list,
+                ['\n'.join(claim_documents[file_hash].section(section_name) or '' for section_name in INDEXED_SECTIONS) for file_hash in pdf_hash_list],
+                get_signature_cache(),
+                )
+            claim_families = find_families(claim_signatures)
+        claim_family_sizes = np.bincount(claim_families)
+
+        # 📌 キャッシュのヒット/ミス数をサイドバーに表示
+        cache_stats = extraction_cache.stats()
+        with st.sidebar.expander("Extraction cache"):
+            st.metric("Hits", cache_stats['hits'])
+            st.metric("Misses", cache_stats['misses'])
+            st.caption(f"{cache_stats['entries']} entries, {cache_stats['size_bytes']/1024/1024:.1f} / {cache_stats['max_bytes']/1024/1024:.0f} MB")
+            st.caption(f"Search index: {len(search_index)} documents, {search_index.size_bytes/1024/1024:.1f} / {search_index.max_bytes/1024/1024:.0f} MB in memory")
+
+    # サイドバーに検索ボックスを追加（カンマ区切りで複数入力）
+    search_query = st.sidebar.text_input("Enter keywords (comma separated)", "")
+    # 検索ワードをリストに変換（カンマで分割して前後の空白を削除）
+    search_terms = [term.strip() for term in search_query.split(',') if term.strip()]
+
+    # サイドバーに全文検索のクエリとセクションの指定を追加
+    full_text_query = st.sidebar.text_input(
+        "Full-text search",
+        "",
+        help='Terms are ANDed. Use OR between terms, -term to exclude, "..." for phrases and claims:/subject:/solution: to scope a term.',
+        )
+    search_sections = st.sidebar.multiselect("Search in sections", INDEXED_SECTIONS, default=INDEXED_SECTIONS)
+    parsed_query = parse_query(full_text_query)
+
+    highlighter = Highlighter(search_terms + parsed_query.terms)  # 🔍 検索語をまとめて1つのパターンにコンパイル
+    require_all_terms = st.sidebar.checkbox("Show only documents containing all keywords", value=False)
+    sort_order = st.sidebar.selectbox("Sort documents by", ["Relevance", "Upload order", "File name", "Keyword hits"])
+    page_size = st.sidebar.selectbox("Documents per page", [10, 20, 50, 100], index=1)
+
+    if len(file_pdfs)>0:
+        doc_indices = list(range(total_files))
+        scores = {}
+        if parsed_query.groups:
+            # 📌 索引から一致する文書をスコア順に取得する
+            with stage('search.query'):
+                search_results, search_ms = search_index.search(parsed_query, search_sections, doc_hashes=pdf_hash_list)
+            scores = dict(search_results)
+            first_index = {}
+            for i, file_hash in enumerate(pdf_hash_list):
+                first_index.setdefault(file_hash, i)
+            doc_indices = [first_index[file_hash] for file_hash, _ in search_results]
+            st.write(f"{len(search_results)} of {total_files} documents matched in {search_ms:.1f} ms")
+
+        # 📌 文書ごとに検索語のヒット数を数える（同じ検索語の間は再計算しない）
+        hit_cache = st.session_state.get('claim_hit_counts')
+        if hit_cache is None or hit_cache['terms'] != tuple(highlighter.terms):
+            hit_cache = {'terms': tuple(highlighter.terms), 'counts': {}}
+            st.session_state['claim_hit_counts'] = hit_cache
+        with stage('highlight.count'):
+            for file_hash in pdf_hash_list:
+                if file_hash not in hit_cache['counts']:
+                    doc = claim_documents[file_hash]
+                    counts = [0] * len(highlighter.terms)
+                    for section_name in ('課題', '解決手段', '特許請求の範囲'):
+                        section_text = doc.section(section_name)
+                        if section_text is not None:
+                            counts = [a + b for a, b in zip(counts, highlighter.count(section_text))]
+                    hit_cache['counts'][file_hash] = counts
+        hit_counts = [hit_cache['counts'][file_hash] for file_hash in pdf_hash_list]
+
+        # 📌 絞り込みと並べ替え
+        if highlighter.terms and require_all_terms:
+            doc_indices = [i for i in doc_indices if all(hit_counts[i])]
+        if sort_order == "Upload order":
+            doc_indices.sort()
+        elif sort_order == "File name":
+            doc_indices.sort(key=lambda i: pdf_name_list[i])
+        elif sort_order == "Keyword hits":
+            doc_indices.sort(key=lambda i: sum(hit_counts[i]), reverse=True)
+
+        # 📌 全文書の概要を表として表示し、選択した文書だけを全文表示する
+        df_docs = pd.DataFrame({
+            'File': [pdf_name_list[i] for i in doc_indices],
+            '課題': [(claim_documents[pdf_hash_list[i]].section('課題') or '')[:60] for i in doc_indices],
+            'Claims': [len(claim_documents[pdf_hash_list[i]].claims) for i in doc_indices],
+            'Independent': [sum(c.is_independent for c in claim_documents[pdf_hash_list[i]].claims) for i in doc_indices],
+            })
+        df_docs['Family'] = [claim_families[i] if claim_family_sizes[claim_families[i]] > 1 else None for i in doc_indices]
+        if scores:
+            df_docs['Score'] = [scores[pdf_hash_list[i]] for i in doc_indices]
+        for t, term in enumerate(highlighter.terms):
+            df_docs[term] = [hit_counts[i][t] for i in doc_indices]
+        st.write("Search terms: ", highlighter.terms)
+        st.caption("Select a row to open the document.")
+        doc_table = st.dataframe(df_docs, hide_index=True, on_select="rerun", selection_mode="single-row", key="claim_doc_table")
+        selected_rows = doc_table.selection.rows
+        if len(selected_rows)>0 and selected_rows[0] < len(doc_indices):
+            i = doc_indices[selected_rows[0]]
+            with st.expander(f"{i+1}/{total_files}: {pdf_name_list[i]}", expanded=True):
+                render_claim_document(claim_documents[pdf_hash_list[i]], highlighter)
+
+        # 📌 表示中のページの文書だけを描画する（折りたたんだ状態で表示）
+        num_pages = max(1, -(-len(doc_indices) // page_size))
+        page_number = st.number_input(f"Page (1-{num_pages})", min_value=1, max_value=num_pages, value=1, step=1)
+        page_indices = doc_indices[(page_number-1)*page_size:page_number*page_size]
+        st.caption(f"Showing {len(page_indices)} of {len(doc_indices)} documents")
+        for i in page_indices:
+            hits_label = f" ({sum(hit_counts[i])} hits)" if highlighter.terms else ""
+            with st.expander(f"{i+1}/{total_files}: {pdf_name_list[i]}{hits_label}", expanded=False):
+                render_claim_document(claim_documents[pdf_hash_list[i]], highlighter)
+
+        st.header("EOF")
@@ -0,0 +1,19 @@
+# common.py
+
+import streamlit as st
+
+from extraction_cache import ExtractionCache
+from near_duplicates import SignatureCache
+
+
+# 📌 PDF の抽出テキストをハッシュキーで保持する永続キャッシュ（セッション間で共有）
+@st.cache_resource
+def get_extraction_cache():
+    """ディスク上の抽出キャッシュを開く"""
+    return ExtractionCache()
+
+# 📌 MinHash署名のキャッシュを抽出キャッシュと同じディレクトリに保存する（セッション間で共有）
+@st.cache_resource
+def get_signature_cache():
+    """ディスク上のMinHash署名のキャッシュを開く"""
+    return SignatureCache(get_extraction_cache().cache_dir)
@@ -0,0 +1,15 @@
+# home.py
+
+import streamlit as st
+
+
+def render():
+    """Homeページ（使い方の説明）"""
+    st.title("Home")
+    st.title("Patent Analysis App")
+    st.write("Welcome to the Patent Analysis Application")
+    st.write("This application is for analyzing patent data.")
+    st.write("1. Find some patents from [J-PlatPat](https://www.j-platpat.inpit.go.jp/).")
+    st.write("2. Download the patent data as CSV files or PDF files.")
+    st.write("3. Select the analysis type from the sidebar.")
+    st.write("4. Upload the CSV files or PDF files.")
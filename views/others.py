@@ -0,0 +1,9 @@
+# others.py
+
+import streamlit as st
+
+
+def render():
+    """Othersページ（その他の分析）"""
+    st.title("Others")
+    st.write("This is a page for other analysis.")
@@ -0,0 +1,489 @@
+# patent.py
+
+import hashlib
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+import streamlit as st
+
+from fi_codes import FI_LEVELS, FiCube
+from ingest import TEXT_COLUMNS, hash_file_bytes, prepare_file, merge_prepared, derive_stage, read_columns, read_text_stage, align_texts
+from snapshot_store import delete_snapshot, list_snapshots, load_snapshot, save_snapshot
+from trends import GRANULARITIES, count_by_period
+from applicants import ApplicantCounts, build_applicant_tables, read_alias_table
+from topics import TopicModel, topic_texts
+from near_duplicates import compute_signatures, find_families
+from profiling import rss_bytes, stage, timed
+from charts import applicant_bar_chart, applicant_bubble_chart, build_figure, figure_caption, trend_chart
+from views.common import get_signature_cache
+
+analysis_list = ["Overview", "Applicant", "FI", "Topic", "Summary"]
+
+
+# 📌 CSVの取り込みパイプライン（各ステージは入力ファイルのハッシュでキャッシュする）
+# 表は読み取り専用として扱い、cache_resourceで同じオブジェクトを返す（cache_dataのようにヒットのたびに複製しない）
+@timed('csv.prepare_file')
+@st.cache_resource(show_spinner=False, max_entries=8)
+def load_prepared_file(file_hash, _file):
+    """1ファイル分の読み込み・重複除去・正規化"""
+    return prepare_file(_file.getvalue())
+
+@timed('csv.merge_files')
+@st.cache_resource(show_spinner=False, max_entries=2)  # 現在のデータセットと、最後のファイルを除いたもの
+def load_merged_files(file_hashes, _files):
+    """ファイルを順に追加したデータセット（直前のファイルまでの結果を再利用し、新しいファイルだけを処理する）"""
+    new = load_prepared_file(file_hashes[-1], _files[file_hashes[-1]])
+    if len(file_hashes) == 1:
+        return new
+    return merge_prepared(load_merged_files(file_hashes[:-1], _files), new)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_date_columns(file_hashes, _files):
+    """日付列の候補"""
+    df, _ = load_merged_files(file_hashes, _files)
+    return [col for col in df.columns if col.endswith('日')]
+
+@timed('csv.load_dataset')
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_dataset(file_hashes, date_col, _files):
+    """日付列から年を派生させた分析用のデータセット"""
+    df, fi_table = load_merged_files(file_hashes, _files)
+    return derive_stage(df, date_col), fi_table
+
+# 📌 文章の列（要約・請求の範囲）は取り込み時には読み込まず、使う機能を有効にしたときに読み込む
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_text_columns(file_hashes, _files):
+    """アップロードされたファイルにある文章の列"""
+    columns = set()
+    for file_hash in file_hashes:
+        columns.update(read_columns(_files[file_hash].getvalue()))
+    return [col for col in TEXT_COLUMNS if col in columns]
+
+@timed('texts.read_file')
+@st.cache_resource(show_spinner=False, max_entries=8)
+def load_text_table(file_hash, _file):
+    """1ファイル分の文章の列"""
+    return read_text_stage(_file.getvalue())
+
+@timed('texts.align')
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_dataset_texts(file_hashes, _files):
+    """データセットの行の並びに揃えた文章の列"""
+    df, _ = load_merged_files(file_hashes, _files)
+    return align_texts(df, [load_text_table(file_hash, _files[file_hash]) for file_hash in file_hashes])
+
+def load_texts(dataset_key, csv_files=None, snapshot_tables=None):
+    """データセットの文章の列（スナップショットの場合は保存済みの表を使う）"""
+    if snapshot_tables is not None:
+        texts = snapshot_tables.get('texts', snapshot_tables['patents'])
+        return texts[[col for col in TEXT_COLUMNS if col in texts.columns]]
+    return load_dataset_texts(dataset_key, csv_files)
+
+# 📌 出願人の次元表と対応表（データセットと別名表のハッシュでキャッシュする）
+@timed('applicants.tables')
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_applicant_tables(dataset_key, alias_hash, _applicant_strings, _aliases):
+    """出願人の次元表と、行と出願人の対応表"""
+    return build_applicant_tables(_applicant_strings, _aliases)
+
+# 📌 出願人ID × 年、出願人ID × ステージの件数（データセットと期間ごとにキャッシュする）
+@timed('applicants.counts')
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_applicant_counts(dataset_key, alias_hash, date_col, start_date, end_date, family_key, _df_date, _applicant_rows, n_applicants):
+    """期間内の行だけで出願人ごとの件数を数える"""
+    applicant_rows = _applicant_rows.loc[_applicant_rows['行'].isin(_df_date.index)]
+    row_positions = _df_date.index.get_indexer(applicant_rows['行'])
+    return ApplicantCounts(
+        applicant_rows['出願人ID'].to_numpy(),
+        _df_date['年'].iloc[row_positions],
+        _df_date['ステージ'].iloc[row_positions],
+        n_applicants,
+        )
+
+# 📌 FI階層 × 年 × ステージの文献数（データセットと期間ごとにキャッシュする）
+@timed('fi.cube')
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_fi_cube(dataset_key, date_col, start_date, end_date, family_key, _df_date, _fi_table):
+    """期間内の文献でFI階層の集計表を作成する"""
+    return FiCube(_fi_table, _df_date['文献番号'], _df_date['年'], _df_date['ステージ'])
+
+# 📌 近似重複のファミリー（データセットとしきい値ごとにキャッシュする）
+@timed('families.detect')
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_families(dataset_key, threshold, _texts):
+    """行ごとのファミリー番号"""
+    doc_hashes = [hashlib.md5(text.encode('utf-8')).hexdigest() for text in _texts]
+    signatures, _ = compute_signatures(doc_hashes, _texts, get_signature_cache())
+    return find_families(signatures, threshold)
+
+# 📌 文献のクラスタリング（データセットとクラスタ数ごとにキャッシュする）
+@timed('topics.cluster')
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_topic_model(dataset_key, n_clusters, _texts):
+    """要約・請求の範囲の文字n-gramで文献をクラスタリングする"""
+    return TopicModel(_texts, n_clusters)
+
+# 📌 保存済みのスナップショットをメモリマップで読み込む（作成日時が変われば読み直す）
+@timed('snapshot.load')
+@st.cache_resource(max_entries=4)
+def load_snapshot_tables(name, created):
+    """スナップショットのテーブルとメタデータ"""
+    return load_snapshot(name)
+
+
+def render():
+    """Patentページ（J-PlatPatのCSVの集計）"""
+    st.title("Patent")
+    file_summaries = st.file_uploader("Upload CSV files", type='csv', accept_multiple_files=True)
+
+    # 📌 保存済みのスナップショットがあれば、CSVの代わりに読み込める
+    snapshots = dict(list_snapshots())
+    snapshot_name = st.sidebar.selectbox(
+        "Load snapshot",
+        [None] + list(snapshots.keys()),
+        format_func=lambda name: "(Uploaded CSV files)" if name is None else f"{snapshots[name].get('name', name)} ({snapshots[name]['tables']['patents']} rows)",
+        )
+    if snapshot_name is not None and st.sidebar.button("Delete snapshot"):
+        delete_snapshot(snapshot_name)
+        load_snapshot_tables.__wrapped__.clear()  # 削除したファイルのメモリマップを解放する
+        st.rerun()
+
+    # 📌 出願人の別名表（1列目: 別名, 2列目: 正式名）
+    with st.sidebar.expander("Applicant aliases"):
+        alias_file = st.file_uploader("Upload alias table (CSV)", type='csv', key='alias_file')
+    alias_hash = None
+    applicant_aliases = None
+    if alias_file is not None:
+        alias_hash = hash_file_bytes(alias_file.getvalue())
+        applicant_aliases = read_alias_table(alias_file.getvalue())
+
+    df = None
+    csv_files = None
+    snapshot_tables = None
+    # 📌 データセットの読み込みの前後で常駐メモリを測る（キャッシュから読み込んだ場合はほぼ0）
+    rss_before_load = rss_bytes()
+    if snapshot_name is not None:
+        with st.spinner('Loading...'):
+            snapshot_tables, snapshot_metadata = load_snapshot_tables(snapshot_name, snapshots[snapshot_name]['created'])
+            date_columns = [col for col in snapshot_tables['patents'].columns if col.endswith('日')]
+            target_date_col = st.sidebar.selectbox("Select date column", date_columns, index=date_columns.index(snapshot_metadata['date_col']))
+            df = derive_stage(snapshot_tables['patents'], target_date_col)
+            df_fi_codes = snapshot_tables['fi_codes']
+            dataset_key = ('snapshot', snapshot_name, snapshot_metadata['created'])
+            text_columns = list(load_texts(dataset_key, snapshot_tables=snapshot_tables).columns)
+            if alias_hash is None and 'applicants' in snapshot_tables:
+                df_applicants, df_applicant_rows = snapshot_tables['applicants'], snapshot_tables['applicant_rows']
+            else:
+                df_applicants, df_applicant_rows = load_applicant_tables(dataset_key, alias_hash, df['出願人/権利者'], applicant_aliases)
+    elif len(file_summaries)>0:
+        # 📌 ファイルのハッシュはアップロードごとに1回だけ計算する
+        file_hash_cache = st.session_state.setdefault('csv_file_hashes', {})
+        csv_files = {}  # ハッシュ値 → アップロードされたファイル
+        for file_summary in file_summaries:
+            if file_summary.file_id not in file_hash_cache:
+                file_hash_cache[file_summary.file_id] = hash_file_bytes(file_summary.getvalue())
+            csv_files[file_hash_cache[file_summary.file_id]] = file_summary
+        file_hashes = tuple(file_hash_cache[file_summary.file_id] for file_summary in file_summaries)
+
+        with st.spinner('Loading...'):
+            target_date_col = st.sidebar.selectbox("Select date column", load_date_columns(file_hashes, csv_files))
+            # 📌 FIコードは文献番号ごとの縦長テーブルに正規化済み（FIのグラフと絞り込みはこのテーブルを使う）
+            df, df_fi_codes = load_dataset(file_hashes, target_date_col, csv_files)
+            dataset_key = file_hashes
+            text_columns = load_text_columns(file_hashes, csv_files)
+            # 📌 出願人名を正規化し、出願人IDで集計できるようにする
+            df_applicants, df_applicant_rows = load_applicant_tables(dataset_key, alias_hash, df['出願人/権利者'], applicant_aliases)
+    rss_after_load = rss_bytes()
+
+    if csv_files is not None:
+        # 📌 準備済みのデータセットを名前を付けて保存する
+        with st.sidebar.expander("Save snapshot"):
+            new_snapshot_name = st.text_input("Snapshot name", f"patents_{datetime.now():%Y%m%d}")
+            if st.button("Save snapshot"):
+                try:
+                    with st.spinner('Saving...'):
+                        save_snapshot(
+                            new_snapshot_name,
+                            {'patents': df, 'fi_codes': df_fi_codes, 'applicants': df_applicants, 'applicant_rows': df_applicant_rows, 'texts': load_texts(dataset_key, csv_files)},
+                            {'date_col': target_date_col, 'source_files': [file_summary.name for file_summary in file_summaries]},
+                            )
+                except ValueError as e:
+                    st.error(str(e))
+                else:
+                    st.success(f"Saved snapshot '{new_snapshot_name}'")
+
+    if df is not None:
+        # pandas.Timestamp → datetime.date に変換
+        min_date = df[target_date_col].min().date()
+        max_date = df[target_date_col].max().date()
+        
+        start_date = st.sidebar.date_input("Start date", min_date, min_value=min_date, max_value=max_date)
+        end_date = st.sidebar.date_input("End date", max_date, min_value=min_date, max_value=max_date)
+
+        df_date = df[(df[target_date_col]>=str(start_date))&(df[target_date_col]<=str(end_date))]
+
+        # 📌 要約・請求の範囲がほぼ同じ文献（分割出願や再公開など）をファミリーにまとめる
+        family_labels = None
+        family_key = None
+        with st.sidebar.expander("Patent families"):
+            if not text_columns:
+                st.caption("There is no summary or claim text in the data.")
+            else:
+                family_enabled = st.checkbox("Detect near-duplicates", key='family_enabled')
+                family_threshold = st.slider("Similarity threshold", 0.5, 1.0, 0.8, 0.05, key='family_threshold')
+                family_dedupe = st.checkbox("Count each family once", key='family_dedupe', disabled=not family_enabled)
+                if family_enabled:
+                    with st.spinner('Detecting near-duplicates...'):
+                        texts = topic_texts(load_texts(dataset_key, csv_files, snapshot_tables))
+                        family_labels = load_families(dataset_key, family_threshold, texts.tolist())
+                    st.caption(f"{len(np.unique(family_labels))} families in {len(family_labels)} patents")
+                    if family_dedupe:
+                        # 期間内でファミリーごとに最初の文献だけを残す（以降の集計はすべてこの文献で行う）
+                        df_date = df_date[~pd.Series(family_labels[df.index.get_indexer(df_date.index)]).duplicated().to_numpy()]
+                        family_key = family_threshold
+
+        granularity = st.sidebar.selectbox("Select trend granularity", list(GRANULARITIES.keys()))
+        stage_selector = st.sidebar.multiselect("Select stage type", df['ステージ'].unique(), default=df['ステージ'].unique(), key='stage_selector')
+        # 📌 期間ごと・ステージごとの件数を1回のグループ集計で数える（最終年も含めた全期間）
+        with stage('trends.count_by_period'):
+            df_period = count_by_period(df_date, target_date_col, GRANULARITIES[granularity], stage_selector)
+        period_x = df_period.index.to_timestamp()
+
+        # 📌 FIの集計は階層ごとの集計表から引く（文献の表は走査しない）
+        fi_cube = load_fi_cube(dataset_key, target_date_col, start_date, end_date, family_key, df_date, df_fi_codes)
+        fi_sections = sorted(df_fi_codes['セクション'].dropna().unique())
+        fi_selector = st.sidebar.multiselect("Select FI Section code", fi_sections, default=fi_sections, key='fi_section_selector')
+
+        with st.spinner('Loading...'):
+            # 📌 出願人ごとの件数は出願人IDを行とする疎行列で持ち、上位N件や推移は行の取り出しで得る
+            applicant_counts = load_applicant_counts(
+                dataset_key, alias_hash, target_date_col, start_date, end_date, family_key, df_date, df_applicant_rows, len(df_applicants))
+            df_applicant = applicant_counts.to_frame(df_applicants)
+
+        applicant_names = df_applicants['出願人'].to_numpy()
+        applicant_id = st.sidebar.selectbox("Select applicant", applicant_counts.ranking, index=0, format_func=lambda i: applicant_names[i])
+        applicant = applicant_names[applicant_id]
+
+        # 📌 トピックのクラスタリング（有効にした場合のみ。結果はデータセット全体に対して1回だけ計算する）
+        topic_model = None
+        with st.sidebar.expander("Topic clustering"):
+            if not text_columns:
+                st.caption("There is no summary or claim text in the data.")
+            else:
+                topic_enabled = st.checkbox("Cluster patents", key='topic_enabled')
+                num_clusters = st.slider("Number of clusters", 2, 30, 8, key='topic_num_clusters')
+                if topic_enabled:
+                    try:
+                        with st.spinner('Clustering...'):
+                            topic_model = load_topic_model(dataset_key, num_clusters, topic_texts(load_texts(dataset_key, csv_files, snapshot_tables)))
+                    except ValueError:
+                        # 文章が空や短すぎて語彙ができない場合（scikit-learnの "empty vocabulary" など）
+                        st.caption("The summary and claim text is too short or empty to cluster.")
+        date_rows = df.index.get_indexer(df_date.index)
+
+        tab_overview, tab_applicant, tab_fi, tab_topic, tab_summary = st.tabs(analysis_list)
+        # 📌 グラフのJSONのサイズはProfilingで指定した場合だけ計測する（グラフ全体のシリアライズが必要なため）
+        measure_payload = st.session_state.get('profile_chart_payload', False)
+
+        with tab_overview:
+            st.header(analysis_list[0])
+            st.write("This is an overview analysis page.")
+            st.write("Please select the date range you want to analyze.")
+            st.write("The selected date range is from {} to {}.".format(start_date, end_date))
+            st.write("The data is as follows.")
+
+            # データの表示
+            st.dataframe(df_date)
+
+            # データの可視化
+            st.header("Visualization")
+            with st.spinner('Visualizing...'):
+                period_series = {f'Counts every {granularity.lower()} (All)': df_period['count'].values}
+                for stage_name in stage_selector:
+                    period_series[f'Counts every {granularity.lower()} ({stage_name})'] = df_period[f'count_{stage_name}'].values
+                fig1, fig1_ms, fig1_bytes = build_figure(
+                    trend_chart, period_x, period_series, f'Patents every {granularity.lower()}', granularity, measure_payload=measure_payload)
+                st.plotly_chart(fig1)
+                st.caption(figure_caption(fig1_ms, fig1_bytes))
+
+            # 📌 近似重複のファミリー（2件以上の文献を含むもの）
+            if family_labels is not None:
+                st.header("Near-duplicate families")
+                date_families = family_labels[df.index.get_indexer(df_date.index)]
+                family_sizes = np.bincount(family_labels)
+                in_family = family_sizes[family_labels] > 1
+                family_columns = [col for col in ['文献番号', '出願日', '発明の名称', '出願人/権利者', 'ステージ'] if col in df.columns]
+                df_families = df.loc[in_family, family_columns]
+                df_families.insert(0, 'ファミリー', family_labels[in_family])
+                st.write(f"{(family_sizes > 1).sum()} families contain {in_family.sum()} patents ({len(np.unique(date_families))} families in the selected date range).")
+                st.dataframe(df_families.sort_values('ファミリー', kind='stable'), hide_index=True)
+
+        with tab_applicant:
+            st.header(analysis_list[1])
+            st.write("This is an applicant analysis page.")
+
+            # データの表示
+            st.write(df_applicant)
+
+            num_applicant = st.slider("Number of applicants", 1, len(df_applicant), 50)
+
+            # データの可視化
+            st.header("Visualization")
+            with st.spinner('Visualizing...'):
+                # 📌 上位N件の出願人のステージ別件数（ステージごとに1トレース）
+                top_applicants = applicant_counts.top(num_applicant)
+                top_names = applicant_names[top_applicants]
+                fig2, fig2_ms, fig2_bytes = build_figure(
+                    applicant_bar_chart, top_names, applicant_counts.stages, applicant_counts.stage_counts(top_applicants), measure_payload=measure_payload)
+                st.plotly_chart(fig2)
+                st.caption(figure_caption(fig2_ms, fig2_bytes))
+
+            with st.spinner("Visualizing..."):
+                fig3, fig3_ms, fig3_bytes = build_figure(
+                    trend_chart,
+                    [f'{year}年' for year in applicant_counts.years],
+                    {'Patents per Stage': applicant_counts.year_counts(applicant_id)},
+                    f'Patents per Applicant ({applicant})',
+                    'Year',
+                    measure_payload=measure_payload,
+                    )
+                st.plotly_chart(fig3)
+                st.caption(figure_caption(fig3_ms, fig3_bytes))
+
+            with st.spinner('Visualizing...'):
+                # 📌 バブルチャートは上位N件の出願人 × 年の件数から作る（出願人が多い場合は凡例なしの1トレース）
+                fig_bubble, fig_bubble_ms, fig_bubble_bytes = build_figure(
+                    applicant_bubble_chart, top_names, applicant_counts.years, applicant_counts.by_year[top_applicants], measure_payload=measure_payload)
+
+                # 📌 Streamlit に表示
+                st.plotly_chart(fig_bubble)
+                st.caption(figure_caption(fig_bubble_ms, fig_bubble_bytes))
+
+        with tab_fi:
+            st.header(analysis_list[2])
+            st.write("This is a FI analysis page.")
+            fi_reference_url = 'https://www.j-platpat.inpit.go.jp/cache/classify/patent/PMGS_HTML/jpp/FI/ja/fiSection/fiSection.html'
+            st.write(f"Please refer to the following URL for the FI classification: [J-PlatPat:FIセクション/広域ファセット選択📌]({fi_reference_url})")
+
+            fi_section_counts = fi_cube.totals('セクション', fi_selector)
+            fig4 = go.Figure()
+            fig4.add_trace(go.Pie(
+                labels=fi_section_counts.index,
+                values=fi_section_counts.values,
+                rotation=0,
+                hole=0.3,
+                title='FI Section',
+                textinfo='label+percent',
+                ))
+            fig4.update_layout(
+                title='FI Section',
+                height=800,
+                width=800,
+                )
+            st.plotly_chart(fig4)
+
+            fi_class_counts = fi_cube.totals('クラス', fi_selector)
+            fig5 = go.Figure()
+            fig5.add_trace(go.Bar(
+                x=fi_class_counts.index,
+                y=fi_class_counts.values,
+                name='FI Class',
+                ))
+            fig5.update_layout(
+                title='FI Class',
+                height=600,
+                width=1200,
+                xaxis_title='FI Class',
+                yaxis_title='Counts',
+                )
+            st.plotly_chart(fig5)
+
+            # 📌 FI階層のドリルダウン（セクション → クラス → サブクラス → グループ）
+            st.header("Drill-down")
+            fi_depth = st.selectbox("Depth", FI_LEVELS[1:], index=1)
+            fi_chart_type = st.radio("Chart type", ['Sunburst', 'Treemap'], horizontal=True)
+            fi_tree = fi_cube.hierarchy(fi_depth, fi_selector)
+            fi_tree_class = go.Sunburst if fi_chart_type == 'Sunburst' else go.Treemap
+            fig_fi_tree = go.Figure(fi_tree_class(
+                ids=fi_tree['id'],
+                labels=fi_tree['label'],
+                parents=fi_tree['parent'],
+                values=fi_tree['value'],
+                customdata=fi_tree['文献数'],
+                branchvalues='remainder',
+                hovertemplate='%{label}<br>Counts: %{customdata}<extra></extra>',
+                maxdepth=3,
+                ))
+            fig_fi_tree.update_layout(title=f'FI {fi_chart_type} ({fi_depth})', height=800, width=800)
+            st.plotly_chart(fig_fi_tree)
+
+            # 📌 選択したコードの下位の階層と、年ごとの推移
+            fi_level = st.selectbox("Level", FI_LEVELS, key='fi_drill_level')
+            fi_level_counts = fi_cube.totals(fi_level, fi_selector)
+            if len(fi_level_counts)>0:
+                fi_code = st.selectbox("Code", fi_level_counts.index, format_func=lambda code: f"{code} ({fi_level_counts[code]})", key='fi_drill_code')
+                fi_trend = fi_cube.trend(fi_level, fi_code)
+                fig_fi_trend = go.Figure()
+                for stage_name in fi_trend.columns:
+                    fig_fi_trend.add_trace(go.Bar(x=fi_trend.index, y=fi_trend[stage_name].values, name=str(stage_name)))
+                fig_fi_trend.update_layout(title=f'Patents per Year ({fi_code})', xaxis_title='Year', yaxis_title='Counts', barmode='stack')
+                st.plotly_chart(fig_fi_trend)
+                if fi_level != FI_LEVELS[-1]:
+                    fi_child_level = FI_LEVELS[FI_LEVELS.index(fi_level)+1]
+                    st.write(fi_cube.totals(fi_child_level, parent=fi_code).rename_axis(fi_child_level).reset_index())
+
+        with tab_topic:
+            st.header(analysis_list[3])
+            st.write("This is a topic analysis page.")
+            if topic_model is None:
+                st.write("Enable 'Cluster patents' in the sidebar to group patents by the text of their summary and claims.")
+            else:
+                cluster_names = topic_model.cluster_names()
+                # 📌 クラスタごとの件数と上位のn-gram
+                cluster_sizes = topic_model.sizes(date_rows)
+                df_topics = pd.DataFrame({
+                    'クラスタ': cluster_sizes.index,
+                    '件数': cluster_sizes.values,
+                    '上位のn-gram': [', '.join(terms) for terms in topic_model.top_terms(10)],
+                    })
+                st.write(df_topics)
+
+                fig_topic = go.Figure(go.Bar(
+                    x=[cluster_names[k] for k in cluster_sizes.index],
+                    y=cluster_sizes.values,
+                    ))
+                fig_topic.update_layout(title='Patents per Cluster', xaxis_title='Cluster', yaxis_title='Counts')
+                st.plotly_chart(fig_topic)
+
+                # 📌 クラスタごとの年次推移
+                cluster_years = topic_model.counts_by(date_rows, df_date['年'])
+                fig_topic_trend = trend_chart(
+                    cluster_years.index.to_numpy(),
+                    {cluster_names[k]: cluster_years[k].values for k in cluster_years.columns},
+                    'Patents per Cluster and Year',
+                    'Year',
+                    )
+                st.plotly_chart(fig_topic_trend)
+
+        with tab_summary:
+            st.header(analysis_list[4])
+            st.write("This is a summary analysis page.")
+            if '要約' not in text_columns:
+                st.write("There is no summary data in the uploaded file.")
+            elif not st.toggle("Show summaries", key='summary_loaded'):
+                st.write("Summaries are loaded only when shown.")
+            else:
+                df_summary = df_date[['文献番号','出願人/権利者']].join(load_texts(dataset_key, csv_files, snapshot_tables)['要約'])
+                # 📌 クラスタで絞り込む
+                if topic_model is not None:
+                    cluster_names = topic_model.cluster_names()
+                    cluster_selector = st.multiselect("Filter by cluster", list(cluster_names), format_func=lambda k: cluster_names[k], key='summary_cluster_selector')
+                    if cluster_selector:
+                        df_summary = df_summary[np.isin(topic_model.labels[date_rows], cluster_selector)]
+                st.write(df_summary)
+
+        # 📌 この実行でのデータセットの読み込みによるメモリの増加（プロセス全体の最大値ではない）
+        if rss_before_load is not None and rss_after_load is not None:
+            st.sidebar.caption(f"Memory used by this load: {(rss_after_load - rss_before_load) / 1024 / 1024:+.0f} MB (process RSS {rss_after_load / 1024 / 1024:.0f} MB)")